@@ -0,0 +1,148 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from models.registry import PAUSE_PRUNING_ENV, prune_artifacts
+from simulate import simulate_fixtures
+from utils import instrumentation
+from utils.match_store import load_matches
+
+MODELS = ["poisson", "random_forest", "dixon_coles"]
+
+# retrain every matchweek, starting once there is half a season of history
+STEP_DAYS = 7
+MIN_TRAIN_DAYS = 180
+
+# clip probabilities for log-loss so a confident miss doesn't give inf
+EPSILON = 1e-15
+
+# history shared by every fold in a worker process
+_HISTORY = None
+
+
+# rolling origins: (train_end, test_end) pairs, one per step
+def make_folds(df, step_days=STEP_DAYS, min_train_days=MIN_TRAIN_DAYS):
+    start = df["date"].min() + pd.Timedelta(days=min_train_days)
+    end = df["date"].max()
+    origins = pd.date_range(start, end, freq=pd.Timedelta(days=step_days))
+    return [(origin, origin + pd.Timedelta(days=step_days)) for origin in origins]
+
+
+# accuracy, multi-class brier score and log-loss of home/draw/away probabilities
+def score_predictions(probabilities, home_goals, away_goals):
+    probabilities = np.asarray(probabilities, dtype=float)
+    outcome = np.where(home_goals > away_goals, 0, np.where(home_goals == away_goals, 1, 2))
+    actual = np.eye(3)[outcome]
+
+    return {
+        "accuracy": float((probabilities.argmax(axis=1) == outcome).mean()),
+        "brier": float(((probabilities - actual) ** 2).sum(axis=1).mean()),
+        "log_loss": float(-np.log(np.clip(probabilities[np.arange(len(outcome)), outcome], EPSILON, 1)).mean()),
+    }
+
+
+def _init_worker(history):
+    global _HISTORY
+    _HISTORY = history
+
+
+# train on everything before the origin and score the following window.
+# train sets are prefixes of the sorted history, so consecutive folds in a worker
+# extend the cached team strength / feature store instead of rebuilding them
+def _run_fold(task):
+    model_name, train_end, test_end = task
+
+    train_rows = _HISTORY["date"].searchsorted(train_end, side="right")
+    test_rows = _HISTORY["date"].searchsorted(test_end, side="right")
+
+    train_df = _HISTORY.iloc[:train_rows]
+    test_df = _HISTORY.iloc[train_rows:test_rows]
+
+    if test_df.empty:
+        return None
+
+    fold = {
+        "model": model_name,
+        "train_end": train_end,
+        "test_end": test_end,
+        "train_matches": len(train_df),
+        "test_matches": len(test_df),
+    }
+
+    result = simulate_fixtures(model_name, test_df, train_df, mode="exact")
+    fold.update(score_predictions(
+        result[["home_win", "draw", "away_win"]],
+        test_df["homeGoals"].to_numpy(),
+        test_df["awayGoals"].to_numpy(),
+    ))
+    return fold
+
+
+# walk-forward backtest of each model, folds spread across a process pool.
+# returns one row per (model, fold) with accuracy, brier and log-loss
+def run_backtest(df, models=MODELS, step_days=STEP_DAYS, min_train_days=MIN_TRAIN_DAYS, workers=None):
+    folds = make_folds(df, step_days, min_train_days)
+    tasks = [(model_name, train_end, test_end) for model_name in models for train_end, test_end in folds]
+
+    workers = workers or os.cpu_count() or 1
+
+    # artifacts are pruned once after the run, not by every worker mid-run
+    paused = os.environ.get(PAUSE_PRUNING_ENV)
+    os.environ[PAUSE_PRUNING_ENV] = "1"
+    try:
+        if workers == 1:
+            _init_worker(df)
+            results = [_run_fold(task) for task in tasks]
+        else:
+            # contiguous chunks keep a model's consecutive folds on the same worker
+            chunksize = max(1, len(tasks) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=instrumentation.init_worker,
+                                     initargs=(instrumentation.worker_state(), _init_worker, df)) as pool:
+                results = instrumentation.map_collected(pool, _run_fold, tasks, chunksize=chunksize)
+    finally:
+        if paused is None:
+            os.environ.pop(PAUSE_PRUNING_ENV)
+
+    if paused is None:
+        prune_artifacts()
+
+    return pd.DataFrame([fold for fold in results if fold is not None])
+
+
+# match-weighted averages per model
+def summarize(folds):
+    weighted = folds[["accuracy", "brier", "log_loss"]].mul(folds["test_matches"], axis=0)
+    weighted["model"] = folds["model"]
+    weighted["test_matches"] = folds["test_matches"]
+
+    summary = weighted.groupby("model").sum()
+    summary[["accuracy", "brier", "log_loss"]] = summary[["accuracy", "brier", "log_loss"]].div(summary["test_matches"], axis=0)
+    summary["folds"] = folds.groupby("model").size()
+
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the prediction models")
+    parser.add_argument("--models", nargs="+", default=MODELS)
+    parser.add_argument("--step-days", type=int, default=STEP_DAYS)
+    parser.add_argument("--min-train-days", type=int, default=MIN_TRAIN_DAYS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="write per-fold results to this csv")
+    parser.add_argument("--competition", default="PL", help="football-data.org competition code")
+    args = parser.parse_args(argv)
+
+    df = load_matches(competitions=[args.competition])
+    folds = run_backtest(df, args.models, args.step_days, args.min_train_days, args.workers)
+
+    if args.output:
+        folds.to_csv(args.output, index=False)
+
+    print(folds.to_string(index=False))
+    print()
+    print(summarize(folds).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,56 @@
+import argparse
 import json
 import os
-import requests
+import sys
 import pandas as pd
-from datetime import datetime, timezone
-from simulate import simulate_match
-from utils.prediction_storage import save_prediction
-from utils.data_updater import append_new_matches
+from simulate import PREDICTION_MODELS, simulate_fixtures, simulate_match
+from utils.fixture_cache import FixtureCache
+from utils import instrumentation
+from utils.instrumentation import timed
+from utils.prediction_storage import PredictionWriter, make_entry, save_prediction
+from utils.prediction_scoring import model_scores, print_scores, score_new_results
+from utils.match_store import concat_matches, load_matches
+from utils.bulk_import import RAW_DATE_FORMAT, import_season_files, raw_kickoffs_utc, read_season_file, season_files
 from utils.name_mapping import normalize_team_name
 
-df = pd.read_csv("data/historical_matches.csv")
+TEAMS_FILE = os.path.join("config", "teams.json")
 
-# load api key from .env
-from dotenv import load_dotenv
+# football-data.org competition predicted and updated (--competition on the command line)
+COMPETITION = "PL"
 
-load_dotenv()
-API_KEY = os.getenv("FOOTBALL_API_KEY")
+# match history and api key are loaded on first use, so importing this module
+# (or running a command that doesn't need them) has no side effects
+df = None
+_API_KEY = None
 
-TEAMS_FILE = os.path.join("config", "teams.json")
-CACHE_FILE = "data/fixtures_cache.json"
+_FIXTURE_CACHE = None
+
+
+# match history of the competition, read from the store once
+def matches():
+    global df
+    if df is None:
+        df = load_matches(competitions=[COMPETITION])
+    return df
 
 
-# loading fixtures from cache
-def load_cache():
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
-    return {}
+# api key from .env
+def api_key():
+    global _API_KEY
+    if _API_KEY is None:
+        from dotenv import load_dotenv
 
+        load_dotenv()
+        _API_KEY = os.getenv("FOOTBALL_API_KEY")
+    return _API_KEY
 
-# saving fixture to cache
-def save_cache(cache):
-    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2)
+
+# fixture cache, opened on first use
+def fixture_cache():
+    global _FIXTURE_CACHE
+    if _FIXTURE_CACHE is None:
+        _FIXTURE_CACHE = FixtureCache()
+    return _FIXTURE_CACHE
 
 
 # loading teams from .json file
@@ -66,61 +84,31 @@ def display_team_menu(teams):
             print(f"\nInvalid input! Enter a number between 1 and {len(sorted_items)}.\n")
 
 
-# loading next fixture from api call for team_id
-def get_next_fixture(team_id, api_key):
-    url = f"https://api.football-data.org/v4/teams/{team_id}/matches"
-    headers = {"X-Auth-Token": api_key}
-    params = {"status": "SCHEDULED", "limit": 1, "competitions": "PL"}
-
-    response = requests.get(url, headers=headers, params=params)
-    data = response.json()
+# every scheduled league match in one api call
+def fetch_scheduled_matches(api_key):
+    # aiohttp is only imported when the network is used
+    from utils.api_client import fetch_competition_matches
 
-    if data['matches']:
-        match = data['matches'][0]
-        home = normalize_team_name(match['homeTeam']['name'])
-        away = normalize_team_name(match['awayTeam']['name'])
-        return {
-            "home": home,
-            "away": away,
-            "date": match['utcDate']
-        }
-    return None
+    return fetch_competition_matches(api_key, COMPETITION, status="SCHEDULED")
 
 
-# loading next fixture from cache for team_id
-def get_cached_fixture(team_id, api_key):
-    cache = load_cache()
-    team_key = str(team_id)
+# fill the cache with every team's upcoming fixtures in one api call; returns how many were cached
+def prefetch_fixtures(api_key):
+    scheduled = fetch_scheduled_matches(api_key)
+    fixture_cache().store_matches(scheduled, COMPETITION)
+    return len(scheduled)
 
-    if team_key in cache:
-        return cache[team_key]
 
-    fixture = get_next_fixture(team_id, api_key)
-    if fixture:
-        cache[team_key] = fixture
-        save_cache(cache)
-    return fixture
-
-
-# checking if cached fixture is outdated
-def is_fixture_outdated(fixture):
-    fixture_time = datetime.fromisoformat(fixture['date'].replace("Z", "+00:00"))
-    now = datetime.now(timezone.utc)
-    return fixture_time < now
+# loading next fixture from cache for team_id (one competition-wide fetch on a miss)
+def get_cached_fixture(team_id, api_key):
+    return fixture_cache().next_fixture(
+        team_id, fetch=lambda: fetch_scheduled_matches(api_key), competition=COMPETITION
+    )
 
 
-# function to remove fixtures from cache that is outdated
+# function to remove fixtures from cache that have kicked off
 def clear_outdated_cache():
-    cache = load_cache()
-    updated = False
-
-    for team_id, fixture in list(cache.items()):
-        if is_fixture_outdated(fixture):
-            del cache[team_id]
-            updated = True
-
-    if updated:
-        save_cache(cache)
+    fixture_cache().purge_expired()
 
 
 # prediction menu (after fixture)
@@ -144,7 +132,7 @@ def prediction_menu(home_team, away_team, fixture_date):
                 model_name="poisson",
                 home_team=home_team,
                 away_team=away_team,
-                df=df,
+                df=matches(),
                 n_simulations=1000
             )
 
@@ -165,7 +153,9 @@ def prediction_menu(home_team, away_team, fixture_date):
                 home_team=home_team,
                 away_team=away_team,
                 top_score=result["top_score"],
-                fixture_date=fixture_date
+                fixture_date=fixture_date,
+                probabilities=probs,
+                top_score_percentage=result["top_score_percentage"],
             )
 
             break
@@ -178,8 +168,8 @@ def prediction_menu(home_team, away_team, fixture_date):
                 model_name="random_forest",
                 home_team=home_team,
                 away_team=away_team,
-                df=df,
-                n_simulations=20
+                df=matches(),
+                n_simulations=1000
             )
 
             print(
@@ -197,8 +187,9 @@ def prediction_menu(home_team, away_team, fixture_date):
                 home_team=home_team,
                 away_team=away_team,
                 top_score=result["top_score"],
-                fixture_date=fixture_date
-
+                fixture_date=fixture_date,
+                probabilities=probs,
+                top_score_percentage=result["top_score_percentage"],
             )
 
             break
@@ -207,17 +198,17 @@ def prediction_menu(home_team, away_team, fixture_date):
             print(f"\nInvalid choice. Enter 1 or 2.\n")
 
 
-# main method
-def main():
+# interactive menus (default when no subcommand is given)
+def interactive():
     clear_outdated_cache()
-    append_new_matches(API_KEY)
+    refresh_matches()
 
     teams = load_teams()
     team_id, team_name = display_team_menu(teams)
 
     print(f"\nYou selected: {team_name}")
 
-    fixture = get_cached_fixture(team_id, API_KEY)
+    fixture = get_cached_fixture(team_id, api_key())
 
     if fixture:
         print(f"Next match: {fixture['home']} vs {fixture['away']} on {fixture['date']}\n")
@@ -227,5 +218,194 @@ def main():
     prediction_menu(fixture['home'], fixture['away'], fixture['date'])
 
 
+# pull new results from the api and extend the loaded dataset
+# so cached model state updates incrementally
+@timed("refresh")
+def refresh_matches():
+    global df
+    from utils.data_updater import append_new_matches
+
+    # a history loaded after the append already holds the new rows
+    loaded = df is not None
+    new_matches = append_new_matches(api_key(), COMPETITION)
+
+    if not new_matches.empty:
+        if loaded:
+            df = concat_matches([df, new_matches])
+
+        # score stored predictions against the new results
+        if score_new_results():
+            print_scores(model_scores())
+
+    return new_matches
+
+
+# fixtures of a round from the latest raw season file. defaults to the
+# earliest round with fixtures after the last stored result
+def raw_round_fixtures(round_number=None):
+    fixtures = pd.concat(read_season_file(season_files()[-1]), ignore_index=True)
+    fixtures["date"] = pd.to_datetime(fixtures["date"], format=RAW_DATE_FORMAT)
+    fixtures = fixtures[fixtures["homeGoals"].isna() & (fixtures["date"] > matches()["date"].max())]
+
+    if round_number is None and not fixtures.empty:
+        round_number = fixtures["round"].min()
+
+    fixtures = fixtures[fixtures["round"] == round_number]
+    fixtures["date"] = raw_kickoffs_utc(fixtures["date"]).dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return fixtures[["round", "date", "homeTeam", "awayTeam"]].reset_index(drop=True)
+
+
+# scheduled fixtures of a matchday from the api (defaults to the next matchday)
+def api_round_fixtures(round_number=None):
+    scheduled = fetch_scheduled_matches(api_key())
+    if round_number is None and scheduled:
+        round_number = min(match["matchday"] for match in scheduled)
+
+    rows = [
+        (match["matchday"], match["utcDate"],
+         normalize_team_name(match["homeTeam"]["name"]), normalize_team_name(match["awayTeam"]["name"]))
+        for match in scheduled if match["matchday"] == round_number
+    ]
+    return pd.DataFrame(rows, columns=["round", "date", "homeTeam", "awayTeam"])
+
+
+@timed("predict")
+def predict_fixtures(fixtures, args):
+    result = simulate_fixtures(args.model, fixtures, matches(), n_simulations=args.simulations, mode=args.mode)
+
+    if args.save:
+        with PredictionWriter() as writer:
+            for row in result.itertuples(index=False):
+                writer.add(make_entry(
+                    row.model_used, row.homeTeam, row.awayTeam, row.top_score, row.date,
+                    probabilities={"home_win": row.home_win, "draw": row.draw, "away_win": row.away_win},
+                    top_score_percentage=row.top_score_percentage,
+                    expected_goals=(row.expected_home, row.expected_away),
+                ))
+
+    return result
+
+
+@timed()
+def write_output(result, args):
+    if args.format == "csv":
+        text = result.to_csv(index=False)
+    else:
+        text = result.to_json(orient="records", indent=2) + "\n"
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Football Predictor (interactive when run without a command)")
+    commands = parser.add_subparsers(dest="command")
+
+    # shared by the prediction commands
+    prediction = argparse.ArgumentParser(add_help=False)
+    prediction.add_argument("--model", choices=sorted(PREDICTION_MODELS), default="poisson")
+    prediction.add_argument("--simulations", type=int, default=1000)
+    prediction.add_argument("--mode", choices=["exact", "batch"], default="exact")
+    prediction.add_argument("--format", choices=["json", "csv"], default="json")
+    prediction.add_argument("--output", help="write predictions to this file instead of stdout")
+    prediction.add_argument("--refresh", action="store_true", help="fetch new results from the api first")
+    prediction.add_argument("--save", action="store_true", help="append predictions to the prediction log")
+
+    # shared by every command
+    competition = argparse.ArgumentParser(add_help=False)
+    competition.add_argument("--competition", default=COMPETITION, help="football-data.org competition code")
+    competition.add_argument(
+        "--instrument", metavar="OPTIONS", type=instrumentation.parse_options, default=None,
+        help=f"write a timing report to data/reports: comma-separated {', '.join(instrumentation.OPTIONS)} "
+             f"or all (default: ${instrumentation.ENV_VAR})",
+    )
+    prediction = argparse.ArgumentParser(add_help=False, parents=[prediction, competition])
+
+    ingest = commands.add_parser("ingest", parents=[competition], help="add new results to the match store")
+    ingest.add_argument("--raw", action="store_true", help="import the raw season files instead of the api")
+    ingest.add_argument("--fixtures", action="store_true", help="also cache every team's upcoming fixtures")
+
+    fixture = commands.add_parser("predict-fixture", parents=[prediction], help="predict a single fixture")
+    fixture.add_argument("home_team")
+    fixture.add_argument("away_team")
+    fixture.add_argument("--date", help="fixture kickoff (iso format), required with --save")
+
+    round_ = commands.add_parser("predict-round", parents=[prediction], help="predict every fixture of a round")
+    round_.add_argument("--round", type=int, help="round number (default: the next round)")
+    round_.add_argument("--source", choices=["raw", "api"], default="raw", help="where fixtures are read from")
+
+    # options are forwarded untouched to backtest.py (see main)
+    commands.add_parser("backtest", add_help=False, help="walk-forward backtest (options as in backtest.py)")
+
+    return parser
+
+
+# headless entry point for scheduled jobs: no menus, network only when asked for
+def run_command(args, parser):
+    global COMPETITION
+    COMPETITION = args.competition
+
+    if args.command == "ingest":
+        if args.raw:
+            print(f"Added {import_season_files(competition=COMPETITION)} new matches to the match store")
+        else:
+            refresh_matches()
+        if args.fixtures:
+            print(f"Cached {prefetch_fixtures(api_key())} upcoming fixtures")
+        return
+
+    if args.command == "predict-fixture" and args.save and not args.date:
+        parser.error("--save requires --date")
+    if args.command == "predict-round" and args.source == "raw" and COMPETITION != "PL":
+        parser.error("raw season files are premier league only, use --source api")
+
+    if args.refresh:
+        refresh_matches()
+
+    # without history every model predicts nan, which a scheduled job would log (or save) as is
+    if matches().empty:
+        parser.error(f"no stored matches for {COMPETITION}, run ingest first")
+
+    if args.command == "predict-fixture":
+        fixtures = pd.DataFrame([{
+            "date": args.date,
+            "homeTeam": normalize_team_name(args.home_team),
+            "awayTeam": normalize_team_name(args.away_team),
+        }])
+    elif args.source == "api":
+        fixtures = api_round_fixtures(args.round)
+    else:
+        fixtures = raw_round_fixtures(args.round)
+
+    if fixtures.empty:
+        print("No fixtures found.", file=sys.stderr)
+        return
+
+    write_output(predict_fixtures(fixtures, args), args)
+
+
+# main method
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    # backtest and interactive runs are instrumented through the environment variable only
+    if argv and argv[0] == "backtest":
+        import backtest
+        with instrumentation.run(["main.py", *argv]):
+            return backtest.main(argv[1:])
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    with instrumentation.run(["main.py", *argv], getattr(args, "instrument", None)):
+        if args.command is None:
+            interactive()
+        else:
+            run_command(args, parser)
+
+
 if __name__ == "__main__":
     main()
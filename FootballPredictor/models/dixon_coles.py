@@ -0,0 +1,218 @@
+import numpy as np
+from scipy.optimize import minimize
+from simulate import poisson_score_matrix
+from utils.frame_cache import FrameCache
+from utils.instrumentation import timed
+
+# time decay of match weights per day (half-life of about a year, as in Dixon & Coles 1997)
+XI = 0.0019
+
+# ridge penalty on attack/defence: pins the otherwise free scale of the ratings
+# and shrinks teams with little (recent) history towards the league average
+L2_PENALTY = 1e-3
+
+# range of the low-score correlation. these bounds don't keep every tau factor positive
+# (1 - lam * mu * rho < 0 once lam * mu > 1 / rho, 1 + lam * rho < 0 once lam > -1 / rho),
+# so the likelihood floors tau and score matrices clip the corrected cells at 0
+RHO_BOUNDS = (-0.2, 0.2)
+
+# fixed parameters ahead of the per-team attack and defence blocks
+MU, HOME, RHO = 0, 1, 2
+N_FIXED = 3
+
+
+# dixon-coles model: log rates mu + home + attack[home] + defence[away] (home side) and
+# mu + attack[away] + defence[home] (away side), with the tau correction for 0-0, 1-0,
+# 0-1 and 1-1. fitted by time-weighted maximum likelihood, warm-started from the
+# previous parameters when matches are appended
+class DixonColes:
+    def __init__(self):
+        self.teams = {}
+        self.home = np.empty(0, dtype=np.int64)
+        self.away = np.empty(0, dtype=np.int64)
+        self.home_goals = np.empty(0, dtype=float)
+        self.away_goals = np.empty(0, dtype=float)
+        self.days = np.empty(0, dtype=np.int64)
+        self.params = np.zeros(N_FIXED)
+        self.fitted = False
+
+    @classmethod
+    def from_matches(cls, df):
+        return cls().update(df)
+
+    # append new match rows and refit from the current parameters
+    def update(self, df):
+        n_teams = len(self.teams)
+        home = self._team_codes(df["homeTeam"])
+        away = self._team_codes(df["awayTeam"])
+
+        # new teams start at the league average
+        if len(self.teams) > n_teams:
+            attack, defence = self._ratings()
+            new = np.zeros(len(self.teams) - n_teams)
+            self.params = np.concatenate([self.params[:N_FIXED], attack, new, defence, new])
+
+        self.home = np.concatenate([self.home, home])
+        self.away = np.concatenate([self.away, away])
+        self.home_goals = np.concatenate([self.home_goals, df["homeGoals"].to_numpy(dtype=float)])
+        self.away_goals = np.concatenate([self.away_goals, df["awayGoals"].to_numpy(dtype=float)])
+        self.days = np.concatenate([self.days, df["date"].to_numpy("datetime64[D]").astype(np.int64)])
+
+        return self.fit()
+
+    # parameter index per row: one dict lookup per category, integer indexing per row
+    def _team_codes(self, teams):
+        teams = teams.astype("category")
+        for team in teams.cat.categories:
+            self.teams.setdefault(str(team), len(self.teams))
+        lookup = np.array([self.teams[str(team)] for team in teams.cat.categories], dtype=np.int64)
+        return lookup[teams.cat.codes.to_numpy()]
+
+    @timed("train")
+    def fit(self):
+        if not len(self.days):
+            return self
+
+        weights = np.exp(-XI * (self.days.max() - self.days))
+
+        x0 = self.params.copy()
+        if not self.fitted:
+            x0[MU] = np.log(np.mean(np.concatenate([self.home_goals, self.away_goals])) + 1e-9)
+
+        bounds = [(None, None), (None, None), RHO_BOUNDS] + [(None, None)] * (len(x0) - N_FIXED)
+        result = minimize(self._objective, x0, args=(weights,), jac=True, method="L-BFGS-B", bounds=bounds)
+
+        self.params = result.x
+        self.fitted = True
+        return self
+
+    def _ratings(self, params=None):
+        params = self.params if params is None else params
+        n = (len(params) - N_FIXED) // 2
+        return params[N_FIXED:N_FIXED + n], params[N_FIXED + n:]
+
+    # negative mean weighted log-likelihood (plus penalty) and its gradient
+    def _objective(self, params, weights):
+        attack, defence = self._ratings(params)
+        rho = params[RHO]
+        x, y = self.home_goals, self.away_goals
+
+        log_lam = params[MU] + params[HOME] + attack[self.home] + defence[self.away]
+        log_mu = params[MU] + attack[self.away] + defence[self.home]
+        lam, mu = np.exp(log_lam), np.exp(log_mu)
+
+        # tau and its partial derivatives for the four low scores
+        s00 = (x == 0) & (y == 0)
+        s01 = (x == 0) & (y == 1)
+        s10 = (x == 1) & (y == 0)
+        s11 = (x == 1) & (y == 1)
+
+        tau = np.ones_like(lam)
+        tau[s00] = 1 - lam[s00] * mu[s00] * rho
+        tau[s01] = 1 + lam[s01] * rho
+        tau[s10] = 1 + mu[s10] * rho
+        tau[s11] = 1 - rho
+
+        dtau_lam = np.zeros_like(lam)
+        dtau_lam[s00] = -mu[s00] * rho
+        dtau_lam[s01] = rho
+        dtau_mu = np.zeros_like(mu)
+        dtau_mu[s00] = -lam[s00] * rho
+        dtau_mu[s10] = rho
+        dtau_rho = np.zeros_like(lam)
+        dtau_rho[s00] = -lam[s00] * mu[s00]
+        dtau_rho[s01] = lam[s01]
+        dtau_rho[s10] = mu[s10]
+        dtau_rho[s11] = -1
+
+        tau = np.maximum(tau, 1e-10)
+        total = weights.sum()
+
+        log_likelihood = weights * (np.log(tau) + x * log_lam - lam + y * log_mu - mu)
+
+        # d/d(log rate) of each match's weighted log-likelihood
+        g_lam = weights * (x - lam + lam * dtau_lam / tau)
+        g_mu = weights * (y - mu + mu * dtau_mu / tau)
+
+        n_teams = len(attack)
+        grad = np.empty_like(params)
+        grad[MU] = g_lam.sum() + g_mu.sum()
+        grad[HOME] = g_lam.sum()
+        grad[RHO] = (weights * dtau_rho / tau).sum()
+        grad[N_FIXED:N_FIXED + n_teams] = (
+            np.bincount(self.home, g_lam, n_teams) + np.bincount(self.away, g_mu, n_teams)
+        )
+        grad[N_FIXED + n_teams:] = (
+            np.bincount(self.away, g_lam, n_teams) + np.bincount(self.home, g_mu, n_teams)
+        )
+
+        penalty = L2_PENALTY * (attack @ attack + defence @ defence)
+        grad = -grad / total
+        grad[N_FIXED:] += 2 * L2_PENALTY * params[N_FIXED:]
+
+        return -log_likelihood.sum() / total + penalty, grad
+
+    def _team_ratings(self, teams):
+        attack, defence = self._ratings()
+        # unknown teams get the trailing zero (league average)
+        index = np.array([self.teams.get(str(team), -1) for team in teams], dtype=np.int64)
+        return np.append(attack, 0.0)[index], np.append(defence, 0.0)[index]
+
+    def expected_goals_batch(self, home_teams, away_teams):
+        home_attack, home_defence = self._team_ratings(home_teams)
+        away_attack, away_defence = self._team_ratings(away_teams)
+
+        expected_home = np.exp(self.params[MU] + self.params[HOME] + home_attack + away_defence)
+        expected_away = np.exp(self.params[MU] + away_attack + home_defence)
+        return expected_home, expected_away
+
+    def expected_goals(self, home_team, away_team):
+        expected_home, expected_away = self.expected_goals_batch([home_team], [away_team])
+        return float(expected_home[0]), float(expected_away[0])
+
+    # analytic (fixtures, goals, goals) score probabilities with the low-score correction
+    def score_matrices(self, home_teams, away_teams):
+        lam, mu = self.expected_goals_batch(home_teams, away_teams)
+        rho = self.params[RHO]
+
+        matrices = poisson_score_matrix(lam, mu)
+        matrices[:, 0, 0] *= np.maximum(1 - lam * mu * rho, 0.0)
+        matrices[:, 0, 1] *= np.maximum(1 + lam * rho, 0.0)
+        matrices[:, 1, 0] *= np.maximum(1 + mu * rho, 0.0)
+        matrices[:, 1, 1] *= 1 - rho
+
+        return matrices / matrices.sum(axis=(1, 2), keepdims=True)
+
+
+_MODEL_CACHE = FrameCache(
+    DixonColes.from_matches,
+    lambda model, new_rows: model.update(new_rows),
+)
+
+
+# fitted model for df, refitted (warm) as matches are appended
+def fitted_model(df):
+    return _MODEL_CACHE.get(df)
+
+
+# expected goals (poisson rates before the low-score correction) for both teams
+def expected_goals(home_team, away_team, df):
+    return fitted_model(df).expected_goals(home_team, away_team)
+
+
+def expected_goals_batch(home_teams, away_teams, df):
+    return fitted_model(df).expected_goals_batch(home_teams, away_teams)
+
+
+def score_matrix(home_team, away_team, df):
+    return fitted_model(df).score_matrices([home_team], [away_team])[0]
+
+
+def score_matrices(home_teams, away_teams, df):
+    return fitted_model(df).score_matrices(home_teams, away_teams)
+
+
+def predict(home_team, away_team, df):
+    matrix = score_matrix(home_team, away_team, df)
+    home_goals, away_goals = np.divmod(np.random.choice(matrix.size, p=matrix.ravel()), matrix.shape[1])
+    return int(home_goals), int(away_goals)
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from utils.instrumentation import count, timed
+
+# rolling form windows (in matches)
+WINDOWS = (5, 15)
+
+
+# feature column names, in model input order
+def feature_columns(windows=WINDOWS):
+    columns = []
+    for k in windows:
+        columns += [
+            f"home_last{k}_scored", f"home_last{k}_conceded",
+            f"away_last{k}_scored", f"away_last{k}_conceded",
+        ]
+    columns += [
+        "home_season_scored", "home_season_conceded",
+        "away_season_scored", "away_season_conceded",
+    ]
+    return columns
+
+
+@timed()
+def build_features(df, windows=WINDOWS):
+    count("feature_rows", len(df))
+    df = df.sort_values("date")
+
+    home_goals = df["homeGoals"].to_numpy(dtype=float)
+    away_goals = df["awayGoals"].to_numpy(dtype=float)
+
+    # form over the previous k matches at home / away, all windows in one pass per series
+    home_scored = rolling_means(df["homeTeam"], home_goals, windows)
+    home_conceded = rolling_means(df["homeTeam"], away_goals, windows)
+    away_scored = rolling_means(df["awayTeam"], away_goals, windows)
+    away_conceded = rolling_means(df["awayTeam"], home_goals, windows)
+
+    for k in windows:
+        df[f"home_last{k}_scored"] = home_scored[k]
+        df[f"home_last{k}_conceded"] = home_conceded[k]
+        df[f"away_last{k}_scored"] = away_scored[k]
+        df[f"away_last{k}_conceded"] = away_conceded[k]
+
+    # Season averages (overall team strength)
+    home_season = df.groupby("homeTeam")[["homeGoals", "awayGoals"]].transform("mean")
+    away_season = df.groupby("awayTeam")[["homeGoals", "awayGoals"]].transform("mean")
+
+    df["home_season_scored"] = home_season["homeGoals"]
+    df["home_season_conceded"] = home_season["awayGoals"]
+    df["away_season_scored"] = away_season["awayGoals"]
+    df["away_season_conceded"] = away_season["homeGoals"]
+
+    return df
+
+
+# per-key mean of the previous k values (excluding the current row), for each k.
+# same result as groupby(keys).transform(lambda x: x.shift().rolling(k, min_periods=1).mean())
+# but computed from grouped cumulative sums instead of a python callback per group
+def rolling_means(keys, values, windows):
+    codes = pd.factorize(keys)[0]
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    sorted_values = values[order]
+
+    valid = ~np.isnan(sorted_values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, sorted_values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+
+    n = len(sorted_values)
+    position = np.arange(n)
+    group_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if n else position
+    group_start = np.repeat(group_starts, np.diff(np.r_[group_starts, n]))
+
+    means = {}
+    for k in windows:
+        lower = np.maximum(group_start, position - k)
+        window_sum = sums[position] - sums[lower]
+        window_count = counts[position] - counts[lower]
+
+        sorted_mean = np.full(n, np.nan)
+        np.divide(window_sum, window_count, out=sorted_mean, where=window_count > 0)
+        sorted_mean[sorted_codes == -1] = np.nan
+
+        mean = np.empty(n)
+        mean[order] = sorted_mean
+        means[k] = mean
+
+    return means
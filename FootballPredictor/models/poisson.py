@@ -1,29 +1,124 @@
 import numpy as np
 import pandas as pd
+from utils.frame_cache import FrameCache
+from utils.instrumentation import timed
 
-def predict(home_team, away_team, df):
+STRENGTH_COLUMNS = [
+    "home_scored", "home_conceded", "home_played",
+    "away_scored", "away_conceded", "away_played",
+]
+
+
+# per-team goal sums and match counts, so predictions are lookups instead of scans
+class TeamStrength:
+    def __init__(self):
+        self.table = pd.DataFrame(columns=STRENGTH_COLUMNS, dtype=float)
+        self.league_home_goals = 0.0
+        self.league_away_goals = 0.0
+        self.league_matches = 0
+        self._refresh_rates()
+
+    @classmethod
+    def from_matches(cls, df):
+        return cls().update(df)
+
+    # fold new match rows into the table
+    @timed("train")
+    def update(self, df):
+        home = df.groupby("homeTeam").agg(
+            home_scored=("homeGoals", "sum"),
+            home_conceded=("awayGoals", "sum"),
+            home_played=("homeGoals", "count"),
+        )
+        away = df.groupby("awayTeam").agg(
+            away_scored=("awayGoals", "sum"),
+            away_conceded=("homeGoals", "sum"),
+            away_played=("awayGoals", "count"),
+        )
+        delta = pd.concat([home, away], axis=1).fillna(0).astype(float)
+
+        self.table = self.table.add(delta, fill_value=0)[STRENGTH_COLUMNS]
+        self.league_home_goals += df["homeGoals"].sum()
+        self.league_away_goals += df["awayGoals"].sum()
+        self.league_matches += int(df["homeGoals"].count())
+
+        self._refresh_rates()
+        return self
+
+    def league_averages(self):
+        if self.league_matches == 0:
+            return np.nan, np.nan
+        return (
+            self.league_home_goals / self.league_matches,
+            self.league_away_goals / self.league_matches,
+        )
+
+    # per-match averages, falling back to league averages for teams without home/away games
+    def _refresh_rates(self):
+        league_avg_home, league_avg_away = self.league_averages()
+        self._fallback = {
+            "home_scored": league_avg_home,
+            "home_conceded": league_avg_away,
+            "away_scored": league_avg_away,
+            "away_conceded": league_avg_home,
+        }
+
+        table = self.table
+        home_played = table["home_played"].where(table["home_played"] > 0)
+        away_played = table["away_played"].where(table["away_played"] > 0)
+
+        self.rates = pd.DataFrame({
+            "home_scored": table["home_scored"] / home_played,
+            "home_conceded": table["home_conceded"] / home_played,
+            "away_scored": table["away_scored"] / away_played,
+            "away_conceded": table["away_conceded"] / away_played,
+        }).fillna(self._fallback)
+        self._lookup = self.rates.to_dict("index")
 
-    # Home team stats
-    home_scored = df[df['homeTeam'] == home_team]['homeGoals'].mean()
+    def expected_goals(self, home_team, away_team):
+        home = self._lookup.get(home_team, self._fallback)
+        away = self._lookup.get(away_team, self._fallback)
 
-    home_conceded = df[df['homeTeam'] == home_team]['awayGoals'].mean()
+        expected_home = (home["home_scored"] + away["away_conceded"]) / 2
+        expected_away = (away["away_scored"] + home["home_conceded"]) / 2
 
-    # Away team stats
-    away_scored = df[df['awayTeam'] == away_team]['awayGoals'].mean()
-    away_conceded = df[df['awayTeam'] == away_team]['homeGoals'].mean()
+        return expected_home, expected_away
 
-    league_avg_home = df['homeGoals'].mean()
-    league_avg_away = df['awayGoals'].mean()
+    # vectorized expected_goals over arrays of fixtures
+    def expected_goals_batch(self, home_teams, away_teams):
+        home = self.rates.reindex(home_teams).fillna(self._fallback)
+        away = self.rates.reindex(away_teams).fillna(self._fallback)
 
-    home_scored = home_scored if not np.isnan(home_scored) else league_avg_home
-    home_conceded = home_conceded if not np.isnan(home_conceded) else league_avg_away
-    away_scored = away_scored if not np.isnan(away_scored) else league_avg_away
-    away_conceded = away_conceded if not np.isnan(away_conceded) else league_avg_home
+        expected_home = (home["home_scored"].to_numpy() + away["away_conceded"].to_numpy()) / 2
+        expected_away = (away["away_scored"].to_numpy() + home["home_conceded"].to_numpy()) / 2
 
-    expected_home = (home_scored + away_conceded) / 2
-    expected_away = (away_scored + home_conceded) / 2
+        return expected_home, expected_away
+
+
+_STRENGTH_CACHE = FrameCache(
+    TeamStrength.from_matches,
+    lambda strength, new_rows: strength.update(new_rows),
+)
+
+
+# strength table for df, built once and extended as matches are appended
+def team_strength(df):
+    return _STRENGTH_CACHE.get(df)
+
+
+# expected goals (poisson rates) for both teams
+def expected_goals(home_team, away_team, df):
+    return team_strength(df).expected_goals(home_team, away_team)
+
+
+def expected_goals_batch(home_teams, away_teams, df):
+    return team_strength(df).expected_goals_batch(home_teams, away_teams)
+
+
+def predict(home_team, away_team, df):
+    expected_home, expected_away = expected_goals(home_team, away_team, df)
 
     pred_home = np.random.poisson(expected_home)
     pred_away = np.random.poisson(expected_away)
 
-    return int(pred_home), int(pred_away)
\ No newline at end of file
+    return int(pred_home), int(pred_away)
@@ -1,125 +1,183 @@
+import multiprocessing
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
+from models.features import WINDOWS, build_features, feature_columns
+from models.registry import load_or_train
+from utils.frame_cache import FrameCache
+from utils.instrumentation import timed
 
 # Global models to keep trained instance
 HOME_MODEL = None
 AWAY_MODEL = None
 
-def build_features(df):
-    df = df.sort_values("date")
+HYPERPARAMS = {"n_estimators": 300, "random_state": 42}
 
-    # Short-term form (last 5 matches)
-    df["home_last5_scored"] = df.groupby("homeTeam")["homeGoals"].transform(
-        lambda x: x.shift().rolling(5, min_periods=1).mean()
-    )
-    df["home_last5_conceded"] = df.groupby("homeTeam")["awayGoals"].transform(
-        lambda x: x.shift().rolling(5, min_periods=1).mean()
-    )
-    df["away_last5_scored"] = df.groupby("awayTeam")["awayGoals"].transform(
-        lambda x: x.shift().rolling(5, min_periods=1).mean()
-    )
-    df["away_last5_conceded"] = df.groupby("awayTeam")["homeGoals"].transform(
-        lambda x: x.shift().rolling(5, min_periods=1).mean()
-    )
+# all model features, in input order
+FEATURES = feature_columns()
 
-    # Longer-term form (last 15 matches)
-    df["home_last15_scored"] = df.groupby("homeTeam")["homeGoals"].transform(
-        lambda x: x.shift().rolling(15, min_periods=1).mean()
-    )
-    df["home_last15_conceded"] = df.groupby("homeTeam")["awayGoals"].transform(
-        lambda x: x.shift().rolling(15, min_periods=1).mean()
-    )
-    df["away_last15_scored"] = df.groupby("awayTeam")["awayGoals"].transform(
-        lambda x: x.shift().rolling(15, min_periods=1).mean()
-    )
-    df["away_last15_conceded"] = df.groupby("awayTeam")["homeGoals"].transform(
-        lambda x: x.shift().rolling(15, min_periods=1).mean()
+HOME_FEATURES = [f for f in FEATURES if f.startswith("home_")]
+AWAY_FEATURES = [f for f in FEATURES if f.startswith("away_")]
+
+
+# features computed once per dataset, plus each team's latest home/away feature vector
+class FeatureStore:
+    def __init__(self, df):
+        self.matches = df
+        self._features = build_features(df.copy())
+        self.home_latest, self.away_latest = _latest_vectors(self._features)
+
+    # full feature frame (training set), rebuilt lazily after updates
+    @property
+    def features(self):
+        if self._features is None:
+            self._features = build_features(self.matches.copy())
+        return self._features
+
+    # fold in appended matches, recomputing latest vectors only for the teams involved
+    def update(self, new_rows):
+        self.matches = pd.concat([self.matches, new_rows])
+        self._features = None
+
+        teams = set(new_rows["homeTeam"]) | set(new_rows["awayTeam"])
+        involved = self.matches["homeTeam"].isin(teams) | self.matches["awayTeam"].isin(teams)
+        home_latest, away_latest = _latest_vectors(build_features(self.matches[involved].copy()))
+
+        # rows against other teams only carry complete history for the teams in the update
+        self.home_latest.update({t: v for t, v in home_latest.items() if t in teams})
+        self.away_latest.update({t: v for t, v in away_latest.items() if t in teams})
+
+        return self
+
+    def feature_row(self, home_team, away_team):
+        if home_team not in self.home_latest or away_team not in self.away_latest:
+            return self.feature_rows([home_team], [away_team])
+
+        row = {**self.home_latest[home_team], **self.away_latest[away_team]}
+        return pd.DataFrame([row], columns=FEATURES)
+
+    # stacked feature matrix for many fixtures.
+    # teams without home/away history (e.g. newly promoted) get the league-average vector
+    def feature_rows(self, home_teams, away_teams):
+        home = _side_rows(self.home_latest, home_teams)
+        away = _side_rows(self.away_latest, away_teams)
+
+        X = pd.concat([home, away], axis=1)
+        return X[FEATURES]
+
+
+def _side_rows(latest, teams):
+    table = pd.DataFrame.from_dict(latest, orient="index")
+    rows = table.reindex(teams)
+
+    unknown = ~rows.index.isin(table.index)
+    if unknown.any():
+        rows.loc[unknown] = table.mean().to_numpy()
+
+    return rows.reset_index(drop=True)
+
+
+# latest row for each team, as {team: {feature: value}} for home and away sides
+def _latest_vectors(features, windows=WINDOWS):
+    columns = feature_columns(windows)
+    home = features.drop_duplicates("homeTeam", keep="last").set_index("homeTeam")
+    away = features.drop_duplicates("awayTeam", keep="last").set_index("awayTeam")
+    return (
+        home[[c for c in columns if c.startswith("home_")]].to_dict("index"),
+        away[[c for c in columns if c.startswith("away_")]].to_dict("index"),
     )
 
-    # Season averages (overall team strength)
-    home_season = df.groupby("homeTeam")[["homeGoals","awayGoals"]].transform("mean")
-    away_season = df.groupby("awayTeam")[["homeGoals","awayGoals"]].transform("mean")
 
-    df["home_season_scored"] = home_season["homeGoals"]
-    df["home_season_conceded"] = home_season["awayGoals"]
-    df["away_season_scored"] = away_season["awayGoals"]
-    df["away_season_conceded"] = away_season["homeGoals"]
+# training matrix for train_df and prediction rows for fixtures after it, as the live
+# model sees them (each team's latest vector), for any feature windows
+def feature_matrices(train_df, home_teams, away_teams, windows=WINDOWS):
+    columns = feature_columns(windows)
+    features = build_features(train_df.copy(), windows)
+    home_latest, away_latest = _latest_vectors(features, windows)
 
-    # Drop NaNs (at start of dataset)
-    # df = df.dropna()
+    X_test = pd.concat([_side_rows(home_latest, home_teams), _side_rows(away_latest, away_teams)], axis=1)
+    return features[columns], features["homeGoals"], features["awayGoals"], X_test[columns]
 
-    return df
 
+_FEATURE_CACHE = FrameCache(FeatureStore, lambda store, new_rows: store.update(new_rows))
+
+
+# feature store for df, built once and extended as matches are appended
+def feature_store(df):
+    return _FEATURE_CACHE.get(df)
+
+
+# trees fitted in parallel: every core in a single process, one per worker inside process
+# pools (backtest, season, tune), which already keep every core busy
+def training_jobs():
+    return -1 if multiprocessing.parent_process() is None else 1
+
+
+def _fit(data, params, n_jobs=None):
+    X = data[FEATURES]
+    y_home = data["homeGoals"]
+    y_away = data["awayGoals"]
+
+    # predict single-threaded afterwards (thread start-up dominates one-row predictions)
+    n_jobs = training_jobs() if n_jobs is None else n_jobs
+    home_model = RandomForestRegressor(n_jobs=n_jobs, **params)
+    away_model = RandomForestRegressor(n_jobs=n_jobs, **params)
+
+    home_model.fit(X, y_home)
+    away_model.fit(X, y_away)
+
+    return home_model.set_params(n_jobs=None), away_model.set_params(n_jobs=None)
+
+
+# fit (or load the saved) home/away models for df
+@timed()
 def train(df):
     global HOME_MODEL, AWAY_MODEL
 
-    df = build_features(df.copy())
+    data = feature_store(df).features[FEATURES + ["homeGoals", "awayGoals"]]
+    HOME_MODEL, AWAY_MODEL = load_or_train("random_forest", data, HYPERPARAMS, _fit)
 
-    features = [
-        # Short-term
-        "home_last5_scored","home_last5_conceded",
-        "away_last5_scored","away_last5_conceded",
-        # Long-term
-        "home_last15_scored","home_last15_conceded",
-        "away_last15_scored","away_last15_conceded",
-        # Season-level
-        "home_season_scored","home_season_conceded",
-        "away_season_scored","away_season_conceded"
-    ]
+    return HOME_MODEL, AWAY_MODEL
 
-    X = df[features]
-    y_home = df["homeGoals"]
-    y_away = df["awayGoals"]
 
-    HOME_MODEL = RandomForestRegressor(n_estimators=300, random_state=42)
-    AWAY_MODEL = RandomForestRegressor(n_estimators=300, random_state=42)
+# models for the current dataset, only reloaded/retrained when the data changes
+_MODEL_CACHE = FrameCache(train)
 
-    HOME_MODEL.fit(X, y_home)
-    AWAY_MODEL.fit(X, y_away)
 
-def predict(home_team, away_team, df):
-    global HOME_MODEL, AWAY_MODEL
+# expected goals (poisson rates) for both teams
+def expected_goals(home_team, away_team, df):
+    home_model, away_model = _MODEL_CACHE.get(df)
 
-    if HOME_MODEL is None:
-        train(df)
-
-    df = build_features(df.copy())
-
-    # Get latest row for each team
-    latest_home = df[df["homeTeam"] == home_team].iloc[-1]
-    latest_away = df[df["awayTeam"] == away_team].iloc[-1]
-
-    X_new = pd.DataFrame([{
-        # Short-term
-        "home_last5_scored": latest_home["home_last5_scored"],
-        "home_last5_conceded": latest_home["home_last5_conceded"],
-        "away_last5_scored": latest_away["away_last5_scored"],
-        "away_last5_conceded": latest_away["away_last5_conceded"],
-        # Long-term
-        "home_last15_scored": latest_home["home_last15_scored"],
-        "home_last15_conceded": latest_home["home_last15_conceded"],
-        "away_last15_scored": latest_away["away_last15_scored"],
-        "away_last15_conceded": latest_away["away_last15_conceded"],
-        # Season
-        "home_season_scored": latest_home["home_season_scored"],
-        "home_season_conceded": latest_home["home_season_conceded"],
-        "away_season_scored": latest_away["away_season_scored"],
-        "away_season_conceded": latest_away["away_season_conceded"],
-    }])
+    X_new = feature_store(df).feature_row(home_team, away_team)
 
     # Predict expected goals
-    expected_home = HOME_MODEL.predict(X_new)[0]
-    expected_away = AWAY_MODEL.predict(X_new)[0]
+    expected_home = home_model.predict(X_new)[0]
+    expected_away = away_model.predict(X_new)[0]
 
     # Clip expected goals to reasonable range
     expected_home = np.clip(expected_home, 0.1, 3.5)
     expected_away = np.clip(expected_away, 0.1, 3.5)
 
+    return expected_home, expected_away
+
+
+# expected goals for many fixtures, one forest call per side
+def expected_goals_batch(home_teams, away_teams, df):
+    home_model, away_model = _MODEL_CACHE.get(df)
+
+    X_new = feature_store(df).feature_rows(home_teams, away_teams)
+
+    expected_home = np.clip(home_model.predict(X_new), 0.1, 3.5)
+    expected_away = np.clip(away_model.predict(X_new), 0.1, 3.5)
+
+    return expected_home, expected_away
+
+
+def predict(home_team, away_team, df):
+    expected_home, expected_away = expected_goals(home_team, away_team, df)
+
     # Poisson sampling to create stochastic goals
     simulated_home = np.random.poisson(expected_home)
     simulated_away = np.random.poisson(expected_away)
 
     return simulated_home, simulated_away
-
-
@@ -0,0 +1,58 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from models.random_forest import FEATURES, HYPERPARAMS, feature_store, training_jobs
+from models.registry import load_or_train
+from utils.frame_cache import FrameCache
+from utils.instrumentation import timed
+
+# Global model to keep trained instance
+MODEL = None
+
+TARGETS = ["homeGoals", "awayGoals"]
+
+
+# one multi-output forest: each tree splits on the summed error of both targets and its
+# leaves hold (home, away) means, so both rates come out of a single pass over the trees
+def _fit(data, params, n_jobs=None):
+    model = RandomForestRegressor(n_jobs=training_jobs() if n_jobs is None else n_jobs, **params)
+    model.fit(data[FEATURES], data[TARGETS])
+    return model.set_params(n_jobs=None)
+
+
+# fit (or load the saved) model for df, on the same features as the two-forest model
+@timed()
+def train(df):
+    global MODEL
+
+    data = feature_store(df).features[FEATURES + TARGETS]
+    MODEL = load_or_train("random_forest_joint", data, HYPERPARAMS, _fit)
+
+    return MODEL
+
+
+# model for the current dataset, only reloaded/retrained when the data changes
+_MODEL_CACHE = FrameCache(train)
+
+
+# expected goals (poisson rates) for both teams
+def expected_goals(home_team, away_team, df):
+    X_new = feature_store(df).feature_row(home_team, away_team)
+    expected_home, expected_away = np.clip(_MODEL_CACHE.get(df).predict(X_new)[0], 0.1, 3.5)
+    return expected_home, expected_away
+
+
+# expected goals for many fixtures, one forest call for both sides
+def expected_goals_batch(home_teams, away_teams, df):
+    X_new = feature_store(df).feature_rows(home_teams, away_teams)
+    expected = np.clip(_MODEL_CACHE.get(df).predict(X_new), 0.1, 3.5)
+    return expected[:, 0], expected[:, 1]
+
+
+def predict(home_team, away_team, df):
+    expected_home, expected_away = expected_goals(home_team, away_team, df)
+
+    # Poisson sampling to create stochastic goals
+    simulated_home = np.random.poisson(expected_home)
+    simulated_away = np.random.poisson(expected_away)
+
+    return simulated_home, simulated_away
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import joblib
+import pandas as pd
+import sklearn
+from utils.instrumentation import count, stage
+
+# trained model artifacts, shared by every entry point regardless of cwd
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "models")
+
+# backtests save one artifact per fold, so only the most recently used are kept
+MAX_ARTIFACTS = 100
+
+# set while a backtest runs (inherited by its worker processes): pruning mid-run races
+# with the other workers and evicts artifacts the run still uses, so it prunes once at the end
+PAUSE_PRUNING_ENV = "FOOTBALL_PAUSE_PRUNING"
+
+
+# hash of the training data, hyperparameters and sklearn version (pickles aren't portable across versions)
+def artifact_key(data, params):
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    digest.update(",".join(map(str, data.columns)).encode())
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update(sklearn.__version__.encode())
+    return digest.hexdigest()[:16]
+
+
+def artifact_path(name, key):
+    return os.path.join(MODEL_DIR, f"{name}-{key}.joblib")
+
+
+# load the models trained on (data, params), training and saving them on a miss
+def load_or_train(name, data, params, train_fn):
+    path = artifact_path(name, artifact_key(data, params))
+
+    if os.path.exists(path):
+        try:
+            with stage("load_artifact"):
+                models = joblib.load(path)
+            os.utime(path)
+            count("artifact_hits")
+            return models
+        except Exception:
+            # corrupt or partial artifact, retrain below
+            pass
+
+    count("artifact_misses")
+    with stage("fit"):
+        models = train_fn(data, params)
+
+    # write to a temp file first so concurrent readers never see a partial artifact
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(models, tmp_path, compress=3)
+    os.replace(tmp_path, path)
+    if not os.getenv(PAUSE_PRUNING_ENV):
+        prune_artifacts()
+
+    return models
+
+
+# drop the least recently used artifacts beyond max_artifacts
+def prune_artifacts(max_artifacts=MAX_ARTIFACTS):
+    if not os.path.isdir(MODEL_DIR):
+        return
+
+    # other processes may remove artifacts between the listing and the stat
+    modified = []
+    for name in os.listdir(MODEL_DIR):
+        if not name.endswith(".joblib"):
+            continue
+        path = os.path.join(MODEL_DIR, name)
+        try:
+            modified.append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    modified.sort(reverse=True)
+
+    for _, path in modified[max_artifacts:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
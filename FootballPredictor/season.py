@@ -0,0 +1,226 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from simulate import PREDICTION_MODELS, score_matrices
+from utils import instrumentation
+from utils.bulk_import import raw_kickoffs_utc, read_season_file, season_files
+from utils.match_store import load_matches, season_of
+from utils.name_mapping import normalize_team_name
+
+N_SIMULATIONS = 100_000
+
+# replays per chunk: bounds memory to a few (chunk x fixtures) arrays
+CHUNK_SIZE = 10_000
+
+# zones reported next to the full position distribution
+TOP_FOUR = 4
+RELEGATED = 3
+
+# fixture cdfs, base table and team incidence shared by every chunk in a worker process
+_SEASON = None
+
+
+# points, goal difference and goals scored per team from this season's results
+def current_table(df, teams):
+    home = pd.DataFrame({
+        "team": df["homeTeam"].astype(str).to_numpy(),
+        "points": np.select([df["homeGoals"] > df["awayGoals"], df["homeGoals"] == df["awayGoals"]], [3, 1], 0),
+        "goal_difference": (df["homeGoals"] - df["awayGoals"]).to_numpy(),
+        "goals_for": df["homeGoals"].to_numpy(),
+        "played": 1,
+    })
+    away = pd.DataFrame({
+        "team": df["awayTeam"].astype(str).to_numpy(),
+        "points": np.select([df["awayGoals"] > df["homeGoals"], df["awayGoals"] == df["homeGoals"]], [3, 1], 0),
+        "goal_difference": (df["awayGoals"] - df["homeGoals"]).to_numpy(),
+        "goals_for": df["awayGoals"].to_numpy(),
+        "played": 1,
+    })
+    table = pd.concat([home, away]).groupby("team").sum()
+    return table.reindex(teams, fill_value=0).astype(int)
+
+
+# every fixture of the season the source is for, with its kickoff date. the raw file holds
+# the whole season; the api's competition matches default to its current season
+def season_fixtures(source="raw", api_key=None, competition="PL"):
+    if source == "api":
+        from utils.api_client import fetch_competition_matches
+
+        matches = fetch_competition_matches(api_key, competition)
+        fixtures = pd.DataFrame({
+            "date": [m["utcDate"] for m in matches],
+            "homeTeam": [normalize_team_name(m["homeTeam"]["name"]) for m in matches],
+            "awayTeam": [normalize_team_name(m["awayTeam"]["name"]) for m in matches],
+        })
+        fixtures["date"] = pd.to_datetime(fixtures["date"], utc=True).dt.tz_convert(None)
+        return fixtures
+
+    fixtures = pd.concat(read_season_file(season_files()[-1]), ignore_index=True)
+    fixtures["date"] = raw_kickoffs_utc(fixtures["date"]).dt.tz_convert(None)
+    return fixtures[["date", "homeTeam", "awayTeam"]]
+
+
+# stored results of a season, empty before its first kickoff
+def season_results(df, season):
+    return df[season_of(df["date"]) == season]
+
+
+# fixtures without a result in played. each pairing is played once per season,
+# so played must only hold the fixtures' own season
+def remaining_fixtures(fixtures, played):
+    done = set(zip(played["homeTeam"].astype(str), played["awayTeam"].astype(str)))
+    keep = [(home, away) not in done for home, away in zip(fixtures["homeTeam"], fixtures["awayTeam"])]
+    return fixtures[keep].reset_index(drop=True)
+
+
+def _init_worker(season):
+    global _SEASON
+    _SEASON = season
+
+
+# replay the remaining fixtures n times; returns (teams x positions) counts and summed points
+def _simulate_chunk(task):
+    n, seed = task
+    cdf, size, base, home_index, away_index = (
+        _SEASON["cdf"], _SEASON["size"], _SEASON["base"], _SEASON["home_index"], _SEASON["away_index"]
+    )
+    rng = np.random.default_rng(seed)
+    n_fixtures, n_teams = len(cdf), len(base)
+
+    # sample a scoreline per fixture and replay, one fixture column at a time
+    draws = rng.random((n, n_fixtures))
+    scores = np.empty((n, n_fixtures), dtype=np.int64)
+    for f in range(n_fixtures):
+        scores[:, f] = np.minimum(np.searchsorted(cdf[f], draws[:, f], side="right"), size * size - 1)
+    home_goals, away_goals = np.divmod(scores, size)
+
+    home_points = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    away_points = np.where(away_goals > home_goals, 3, np.where(away_goals == home_goals, 1, 0))
+
+    # (replays x teams) totals: base table plus this replay's fixtures
+    points = np.tile(base[:, 0], (n, 1))
+    goal_difference = np.tile(base[:, 1], (n, 1))
+    goals_for = np.tile(base[:, 2], (n, 1))
+    for team_index, team_points, scored, conceded in (
+        (home_index, home_points, home_goals, away_goals),
+        (away_index, away_points, away_goals, home_goals),
+    ):
+        for f, team in enumerate(team_index):
+            points[:, team] += team_points[:, f]
+            goal_difference[:, team] += scored[:, f] - conceded[:, f]
+            goals_for[:, team] += scored[:, f]
+
+    # league order: points, goal difference, goals scored, then a coin toss
+    key = points * 1e8 + (goal_difference + 5000) * 1e4 + goals_for + rng.random((n, n_teams))
+    order = np.argsort(-key, axis=1)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(n_teams)[None, :], axis=1)
+
+    counts = np.bincount(
+        (np.arange(n_teams)[None, :] * n_teams + positions).ravel(), minlength=n_teams * n_teams
+    ).reshape(n_teams, n_teams)
+    return counts, points.sum(axis=0)
+
+
+# monte carlo replays of the rest of the season. returns per-team position probabilities
+# (columns 1..n_teams) with expected points, title, top-four and relegation odds.
+# season is the start year the fixtures belong to, its stored results form the base table
+def simulate_season(df, fixtures, season, model_name="poisson", n_simulations=N_SIMULATIONS,
+                    chunk_size=CHUNK_SIZE, workers=None, seed=None):
+    played = season_results(df, season)
+
+    teams = sorted(
+        set(played["homeTeam"].astype(str)) | set(played["awayTeam"].astype(str))
+        | set(fixtures["homeTeam"]) | set(fixtures["awayTeam"])
+    )
+    team_ids = {team: i for i, team in enumerate(teams)}
+    table = current_table(played, teams)
+
+    matrices = score_matrices(model_name, fixtures["homeTeam"].to_numpy(), fixtures["awayTeam"].to_numpy(), df)
+    cdf = np.cumsum(matrices.reshape(len(matrices), -1), axis=1)
+    cdf /= cdf[:, -1:]
+
+    shared = {
+        "cdf": cdf,
+        "size": matrices.shape[-1],
+        "base": table[["points", "goal_difference", "goals_for"]].to_numpy(),
+        "home_index": fixtures["homeTeam"].map(team_ids).to_numpy(),
+        "away_index": fixtures["awayTeam"].map(team_ids).to_numpy(),
+    }
+
+    sizes = [chunk_size] * (n_simulations // chunk_size)
+    if n_simulations % chunk_size:
+        sizes.append(n_simulations % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = list(zip(sizes, seeds))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(shared)
+        results = [_simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=instrumentation.init_worker,
+                                 initargs=(instrumentation.worker_state(), _init_worker, shared)) as pool:
+            results = instrumentation.map_collected(pool, _simulate_chunk, tasks)
+
+    counts = sum(result[0] for result in results)
+    total_points = sum(result[1] for result in results)
+
+    n_teams = len(teams)
+    summary = pd.DataFrame(counts / n_simulations, index=teams, columns=range(1, n_teams + 1))
+    summary.insert(0, "points", table["points"])
+    summary.insert(1, "expected_points", total_points / n_simulations)
+    summary.insert(2, "title", summary[1])
+    summary.insert(3, "top_four", summary[list(range(1, TOP_FOUR + 1))].sum(axis=1))
+    summary.insert(4, "relegation", summary[list(range(n_teams - RELEGATED + 1, n_teams + 1))].sum(axis=1))
+    return summary.sort_values("expected_points", ascending=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo projection of the current season")
+    parser.add_argument("--model", choices=sorted(PREDICTION_MODELS), default="dixon_coles")
+    parser.add_argument("--simulations", type=int, default=N_SIMULATIONS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--source", choices=["raw", "api"], default="raw", help="where remaining fixtures are read from")
+    parser.add_argument("--competition", default="PL", help="football-data.org competition code")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="write the position table to this csv")
+    args = parser.parse_args(argv)
+
+    if args.source == "raw" and args.competition != "PL":
+        parser.error("raw season files are premier league only, use --source api")
+
+    df = load_matches(competitions=[args.competition])
+
+    api_key = None
+    if args.source == "api":
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        api_key = os.getenv("FOOTBALL_API_KEY")
+
+    # the season comes from the fixtures, not the store: between seasons the store
+    # still ends with last season's results
+    fixtures = season_fixtures(args.source, api_key, args.competition)
+    if fixtures.empty:
+        parser.error(f"no fixtures found for {args.competition}")
+    season = season_of(fixtures["date"]).min()
+    fixtures = remaining_fixtures(fixtures, season_results(df, season))
+
+    summary = simulate_season(
+        df, fixtures, season, args.model, args.simulations, args.chunk_size, args.workers, args.seed
+    )
+
+    if args.output:
+        summary.to_csv(args.output)
+
+    columns = ["points", "expected_points", "title", "top_four", "relegation"]
+    print(f"{len(fixtures)} fixtures remaining, {args.simulations} replays ({args.model})\n")
+    print(summary[columns].round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
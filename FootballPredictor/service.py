@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import threading
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from simulate import PREDICTION_MODELS, simulate_fixtures, simulate_match
+from utils.match_store import DEFAULT_COMPETITION, concat_matches, csv_path, load_matches
+from utils.name_mapping import normalize_team_name
+from utils.prediction_scoring import read_new_results
+
+HOST = "127.0.0.1"
+PORT = 8000
+
+# threads serving requests
+WORKERS = 8
+
+# how often the csv mirror is checked for newly ingested matches
+RELOAD_SECONDS = 30
+
+# request limits: simulation modes served over http, samples and fixtures per request
+HTTP_MODES = ("exact", "batch")
+MAX_SIMULATIONS = 100_000
+MAX_BATCH_FIXTURES = 1000
+
+
+# many readers or one writer. predictions only read the warmed model caches, so they run
+# concurrently; a reload takes the write side while it re-warms caches and swaps the frame
+class ReadWriteLock:
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writing:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+# match history and model state kept warm between requests.
+# model caches (team strength, feature store, trained forest) hold one frame each: a
+# prediction on the warmed frame only reads them, but warming a new frame rebuilds them.
+# reloads are serialized end to end (offset read, append, commit), and only the re-warm
+# and swap exclude predictions
+class PredictionService:
+    def __init__(self, models=None, competition=DEFAULT_COMPETITION):
+        self.models = list(models or PREDICTION_MODELS)
+        self.competition = competition
+        self.csv_path = csv_path(competition)
+        self.lock = ReadWriteLock()
+        self.reload_lock = threading.Lock()
+        self.df = None
+        self.offset = 0
+        self.loaded_at = None
+        self.reload(full=True)
+
+    def reload(self, full=False):
+        with self.reload_lock:
+            # the csv mirror is append-only between imports; a shorter file means it was rewritten
+            if full or not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) < self.offset:
+                df = load_matches(competitions=[self.competition])
+                offset = os.path.getsize(self.csv_path) if os.path.exists(self.csv_path) else 0
+                added = len(df)
+            else:
+                new_rows, offset = read_new_results(self.offset, self.csv_path, self.competition)
+                if new_rows.empty:
+                    self.offset = offset
+                    return 0
+                df = concat_matches([self.df, new_rows])
+                added = len(new_rows)
+
+            with self.lock.write():
+                self._warm(df)
+                self.df = df
+                self.offset = offset
+                self.loaded_at = time.time()
+            return added
+
+    def _warm(self, df):
+        teams = df["homeTeam"].astype(str).iloc[-2:].to_numpy()
+        fixtures = pd.DataFrame({"homeTeam": teams[:1], "awayTeam": teams[1:]})
+        for model_name in self.models:
+            simulate_fixtures(model_name, fixtures, df)
+
+    def predict(self, home_team, away_team, model_name="poisson", mode="exact", n_simulations=1000):
+        self._check_model(model_name)
+        with self.lock.read():
+            result = simulate_match(
+                model_name, normalize_team_name(home_team), normalize_team_name(away_team),
+                self.df, n_simulations=n_simulations, mode=mode,
+            )
+        result["home_team"] = normalize_team_name(home_team)
+        result["away_team"] = normalize_team_name(away_team)
+        return result
+
+    def predict_batch(self, fixtures, model_name="poisson", mode="exact", n_simulations=1000):
+        self._check_model(model_name)
+        fixtures = pd.DataFrame({
+            "homeTeam": [normalize_team_name(f["home_team"]) for f in fixtures],
+            "awayTeam": [normalize_team_name(f["away_team"]) for f in fixtures],
+        })
+        with self.lock.read():
+            result = simulate_fixtures(model_name, fixtures, self.df, n_simulations=n_simulations, mode=mode)
+        return json.loads(result.rename(columns={"homeTeam": "home_team", "awayTeam": "away_team"}).to_json(orient="records"))
+
+    def _check_model(self, model_name):
+        if model_name not in self.models:
+            raise ValueError(f"Model not loaded: {model_name}")
+
+    def status(self):
+        return {
+            "matches": len(self.df),
+            "last_match": self.df["date"].max().isoformat(),
+            "models": self.models,
+            "competition": self.competition,
+            "loaded_at": self.loaded_at,
+        }
+
+    # poll the csv mirror and fold new matches in
+    def watch(self, interval=RELOAD_SECONDS):
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"Reload failed: {e}")
+
+        threading.Thread(target=loop, daemon=True).start()
+
+
+# model options of a request body, within the limits served over http
+def _request_options(body):
+    mode = body.get("mode", "exact")
+    if mode not in HTTP_MODES:
+        raise ValueError(f"Unsupported mode: {mode} (expected one of {', '.join(HTTP_MODES)})")
+
+    n_simulations = int(body.get("simulations", 1000))
+    if not 1 <= n_simulations <= MAX_SIMULATIONS:
+        raise ValueError(f"simulations must be between 1 and {MAX_SIMULATIONS}")
+
+    return {"model_name": body.get("model", "poisson"), "mode": mode, "n_simulations": n_simulations}
+
+
+# GET /health, POST /predict, POST /predict/batch, POST /reload
+class ServiceHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self._send(200, self.service.status())
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            options = _request_options(body)
+
+            if self.path == "/predict":
+                return self._send(200, self.service.predict(body["home_team"], body["away_team"], **options))
+            if self.path == "/predict/batch":
+                if len(body["fixtures"]) > MAX_BATCH_FIXTURES:
+                    raise ValueError(f"At most {MAX_BATCH_FIXTURES} fixtures per request")
+                return self._send(200, {"predictions": self.service.predict_batch(body["fixtures"], **options)})
+            if self.path == "/reload":
+                return self._send(200, {"added": self.service.reload(full=bool(body.get("full")))})
+            self._send(404, {"error": "not found"})
+        except (KeyError, ValueError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# requests are handed to a fixed pool of threads instead of one new thread each
+class PooledHTTPServer(ThreadingHTTPServer):
+    def __init__(self, address, handler, workers=WORKERS):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+# load and warm the service, then serve in a background thread; returns (server, base url)
+def start_service(models=None, host=HOST, port=PORT, workers=WORKERS, reload_seconds=RELOAD_SECONDS,
+                  competition=DEFAULT_COMPETITION):
+    service = PredictionService(models, competition)
+    if reload_seconds:
+        service.watch(reload_seconds)
+
+    handler = type("Handler", (ServiceHandler,), {"service": service})
+    server = PooledHTTPServer((host, port), handler, workers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local prediction service")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--models", nargs="+", choices=sorted(PREDICTION_MODELS), default=None)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--reload-seconds", type=int, default=RELOAD_SECONDS, help="0 disables polling")
+    parser.add_argument("--competition", default=DEFAULT_COMPETITION, help="football-data.org competition code")
+    args = parser.parse_args()
+
+    server, url = start_service(
+        args.models, args.host, args.port, args.workers, args.reload_seconds, args.competition
+    )
+    print(f"Serving predictions on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
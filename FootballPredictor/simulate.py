@@ -1,46 +1,205 @@
-from models import poisson, random_forest
+import importlib
+import numpy as np
+from utils.instrumentation import count, timed
 
+# model plugins by name: module paths, imported on first use so a run only
+# pays for the models (and dependencies such as sklearn) it actually uses
 PREDICTION_MODELS = {
-    "poisson": poisson.predict,
-    "random_forest": random_forest.predict,
+    "poisson": "models.poisson",
+    "random_forest": "models.random_forest",
+    "random_forest_joint": "models.random_forest_joint",
+    "dixon_coles": "models.dixon_coles",
 }
 
+SIMULATION_MODES = ("batch", "loop", "exact")
 
-def simulate_match(model_name, home_team, away_team, df, n_simulations=1000):
+# score matrix truncation for exact mode (p(>10 goals) is negligible)
+MAX_GOALS = 10
+
+
+def register_model(model_name, module_path):
+    PREDICTION_MODELS[model_name] = module_path
+
+
+def get_model(model_name):
     if model_name not in PREDICTION_MODELS:
         raise ValueError(f"Unknown model: {model_name}")
+    return importlib.import_module(PREDICTION_MODELS[model_name])
+
+
+@timed("simulate")
+def simulate_match(model_name, home_team, away_team, df, n_simulations=1000, mode="batch"):
+    model = get_model(model_name)
+    if mode not in SIMULATION_MODES:
+        raise ValueError(f"Unknown simulation mode: {mode}")
+
+    if mode == "loop":
+        score_matrix = _simulate_loop(model, home_team, away_team, df, n_simulations)
+        return _summarize(model_name, score_matrix, n_simulations)
+
+    # models with their own score distribution (e.g. dixon-coles) provide it directly
+    if hasattr(model, "score_matrix"):
+        score_matrix = model.score_matrix(home_team, away_team, df)
+        if mode == "exact":
+            return _summarize(model_name, score_matrix, 1.0)
+        counts = np.random.multinomial(n_simulations, score_matrix.ravel()).reshape(score_matrix.shape)
+        return _summarize(model_name, counts, n_simulations)
+
+    expected_home, expected_away = model.expected_goals(home_team, away_team, df)
+
+    if mode == "exact":
+        score_matrix = poisson_score_matrix(expected_home, expected_away)
+        return _summarize(model_name, score_matrix, 1.0)
+
+    score_matrix = _simulate_batch(expected_home, expected_away, n_simulations)
+    return _summarize(model_name, score_matrix, n_simulations)
+
+
+# predict every fixture (rows with homeTeam/awayTeam) in one model call.
+# returns the fixtures with expected goals, outcome probabilities and top score columns
+@timed("simulate")
+def simulate_fixtures(model_name, fixtures, df, n_simulations=1000, mode="exact"):
+    model = get_model(model_name)
+    count("fixtures_predicted", len(fixtures))
+    if mode not in ("batch", "exact"):
+        raise ValueError(f"Unsupported simulation mode for fixture batches: {mode}")
+
+    expected_home, expected_away = model.expected_goals_batch(
+        fixtures["homeTeam"].to_numpy(), fixtures["awayTeam"].to_numpy(), df
+    )
+    expected_home = np.asarray(expected_home, dtype=float)
+    expected_away = np.asarray(expected_away, dtype=float)
+
+    if hasattr(model, "score_matrices"):
+        score_matrices = model.score_matrices(
+            fixtures["homeTeam"].to_numpy(), fixtures["awayTeam"].to_numpy(), df
+        )
+        if mode == "batch":
+            n_fixtures, size = len(score_matrices), score_matrices.shape[-1]
+            counts = np.random.default_rng().multinomial(
+                n_simulations, score_matrices.reshape(n_fixtures, -1)
+            )
+            score_matrices = counts.reshape(n_fixtures, size, size) / n_simulations
+    elif mode == "exact":
+        score_matrices = poisson_score_matrix(expected_home, expected_away)
+    else:
+        home_goals = np.random.poisson(expected_home[:, None], (len(fixtures), n_simulations))
+        away_goals = np.random.poisson(expected_away[:, None], (len(fixtures), n_simulations))
+        score_matrices = _tally_scores_batch(home_goals, away_goals) / n_simulations
+
+    return _summarize_batch(model_name, fixtures, expected_home, expected_away, score_matrices)
+
+
+# (fixtures, goals, goals) score probabilities from any registered model: its own
+# matrices when it has them, else independent poissons on its expected goals
+def score_matrices(model_name, home_teams, away_teams, df):
+    model = get_model(model_name)
+    if hasattr(model, "score_matrices"):
+        return model.score_matrices(home_teams, away_teams, df)
+
+    expected_home, expected_away = model.expected_goals_batch(home_teams, away_teams, df)
+    return poisson_score_matrix(expected_home, expected_away)
+
 
-    prediction_fn = PREDICTION_MODELS[model_name]
+# closed-form P(home=i, away=j) for two independent poissons, truncated at max_goals.
+# broadcasts over arrays of expected goals, giving a (..., max_goals + 1, max_goals + 1) stack
+def poisson_score_matrix(expected_home, expected_away, max_goals=MAX_GOALS):
+    goals = np.arange(max_goals + 1)
+    log_factorial = np.concatenate(([0.0], np.cumsum(np.log(goals[1:]))))
 
-    home_wins = 0
-    draws = 0
-    away_wins = 0
-    score_counts = {}
+    expected_home = np.asarray(expected_home, dtype=float)[..., None]
+    expected_away = np.asarray(expected_away, dtype=float)[..., None]
 
-    for _ in range(n_simulations):
-        h, a = prediction_fn(home_team, away_team, df)
+    home_pmf = np.exp(_xlogy(goals, expected_home) - expected_home - log_factorial)
+    away_pmf = np.exp(_xlogy(goals, expected_away) - expected_away - log_factorial)
 
-        if h > a:
-            home_wins += 1
-        elif h < a:
-            away_wins += 1
-        else:
-            draws += 1
+    score_matrix = home_pmf[..., :, None] * away_pmf[..., None, :]
+    return score_matrix / score_matrix.sum(axis=(-2, -1), keepdims=True)
 
-        score = f"{h}-{a}"
-        score_counts[score] = score_counts.get(score, 0) + 1
 
-    top_score = max(score_counts, key=score_counts.get)
-    top_percentage = score_counts[top_score] / n_simulations
+# x * log(y) with 0 * log(0) = 0, so a zero rate puts all mass on 0 goals instead of giving nan
+# (scipy.special.xlogy without importing scipy on the prediction path)
+def _xlogy(x, y):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(x == 0, 0.0, x * np.log(y))
+
+
+# original per-sample loop, one model call per simulation
+def _simulate_loop(model, home_team, away_team, df, n_simulations):
+    home_goals = np.empty(n_simulations, dtype=np.int64)
+    away_goals = np.empty(n_simulations, dtype=np.int64)
+
+    for i in range(n_simulations):
+        home_goals[i], away_goals[i] = model.predict(home_team, away_team, df)
+
+    return _tally_scores(home_goals, away_goals)
+
+
+# draw all samples from the expected goals at once
+def _simulate_batch(expected_home, expected_away, n_simulations):
+    home_goals = np.random.poisson(expected_home, n_simulations)
+    away_goals = np.random.poisson(expected_away, n_simulations)
+
+    return _tally_scores(home_goals, away_goals)
+
+
+# count scorelines into a (home goals x away goals) matrix
+def _tally_scores(home_goals, away_goals):
+    size = int(max(home_goals.max(), away_goals.max())) + 1
+    counts = np.bincount(home_goals * size + away_goals, minlength=size * size)
+    return counts.reshape(size, size)
+
+
+# per-row score count matrices for (fixtures x samples) goal arrays
+def _tally_scores_batch(home_goals, away_goals):
+    n_fixtures = home_goals.shape[0]
+    size = int(max(home_goals.max(), away_goals.max())) + 1
+    rows = np.arange(n_fixtures)[:, None]
+
+    counts = np.bincount(
+        ((rows * size + home_goals) * size + away_goals).ravel(),
+        minlength=n_fixtures * size * size,
+    )
+    return counts.reshape(n_fixtures, size, size)
+
+
+def _summarize_batch(model_name, fixtures, expected_home, expected_away, score_matrices):
+    size = score_matrices.shape[-1]
+    top = score_matrices.reshape(len(score_matrices), -1).argmax(axis=1)
+    top_home, top_away = np.divmod(top, size)
+
+    result = fixtures.copy()
+    result["model_used"] = model_name
+    result["expected_home"] = expected_home
+    result["expected_away"] = expected_away
+    result["home_win"] = np.tril(score_matrices, -1).sum(axis=(1, 2))
+    result["draw"] = np.trace(score_matrices, axis1=1, axis2=2)
+    result["away_win"] = np.triu(score_matrices, 1).sum(axis=(1, 2))
+    result["top_score"] = [f"{h}-{a}" for h, a in zip(top_home, top_away)]
+    result["top_score_percentage"] = score_matrices.reshape(len(score_matrices), -1)[np.arange(len(top)), top]
+
+    return result
+
+
+def _summarize(model_name, score_matrix, total):
+    home_goals, away_goals = np.nonzero(score_matrix)
+    # counts for sampled modes, probabilities for exact mode
+    score_counts = {
+        f"{h}-{a}": score_matrix[h, a].item()
+        for h, a in zip(home_goals, away_goals)
+    }
+
+    top_home, top_away = np.unravel_index(np.argmax(score_matrix), score_matrix.shape)
+    top_score = f"{top_home}-{top_away}"
 
     return {
         "model_used": model_name,
         "probabilities": {
-            "home_win": home_wins / n_simulations,
-            "draw": draws / n_simulations,
-            "away_win": away_wins / n_simulations,
+            "home_win": float(np.tril(score_matrix, -1).sum() / total),
+            "draw": float(np.trace(score_matrix) / total),
+            "away_win": float(np.triu(score_matrix, 1).sum() / total),
         },
         "score_distribution": score_counts,
         "top_score": top_score,
-        "top_score_percentage": top_percentage
+        "top_score_percentage": float(score_matrix[top_home, top_away] / total)
     }
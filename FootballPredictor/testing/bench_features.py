@@ -0,0 +1,106 @@
+import math
+import sys
+import os
+import time
+import pandas as pd
+
+# give root path to  file
+project_root = os.path.abspath(os.path.join(os.getcwd(), ".."))
+sys.path.append(project_root)
+from models.features import build_features, feature_columns
+
+DATA_PATH = "../data/historical_matches.csv"
+SEASON_COUNTS = [3, 10, 30]
+LEAGUE_COUNTS = [1, 5]
+REPEATS = 3
+
+
+# original lambda-based implementation, kept as the reference output
+def build_features_reference(df):
+    df = df.sort_values("date")
+
+    for k in (5, 15):
+        df[f"home_last{k}_scored"] = df.groupby("homeTeam")["homeGoals"].transform(
+            lambda x: x.shift().rolling(k, min_periods=1).mean()
+        )
+        df[f"home_last{k}_conceded"] = df.groupby("homeTeam")["awayGoals"].transform(
+            lambda x: x.shift().rolling(k, min_periods=1).mean()
+        )
+        df[f"away_last{k}_scored"] = df.groupby("awayTeam")["awayGoals"].transform(
+            lambda x: x.shift().rolling(k, min_periods=1).mean()
+        )
+        df[f"away_last{k}_conceded"] = df.groupby("awayTeam")["homeGoals"].transform(
+            lambda x: x.shift().rolling(k, min_periods=1).mean()
+        )
+
+    home_season = df.groupby("homeTeam")[["homeGoals", "awayGoals"]].transform("mean")
+    away_season = df.groupby("awayTeam")[["homeGoals", "awayGoals"]].transform("mean")
+
+    df["home_season_scored"] = home_season["homeGoals"]
+    df["home_season_conceded"] = home_season["awayGoals"]
+    df["away_season_scored"] = away_season["awayGoals"]
+    df["away_season_conceded"] = away_season["homeGoals"]
+
+    return df
+
+
+# repeat the real history back in time until it covers n_seasons
+def tile_seasons(df, n_seasons):
+    years_per_copy = math.ceil((df["date"].max() - df["date"].min()).days / 365)
+    copies = math.ceil(n_seasons / years_per_copy)
+    span = pd.DateOffset(years=years_per_copy)
+
+    frames = []
+    for i in range(copies):
+        frame = df.copy()
+        frame["date"] = frame["date"] - span * i
+        frames.append(frame)
+
+    tiled = pd.concat(frames, ignore_index=True)
+    tiled = tiled[tiled["date"] > tiled["date"].max() - pd.DateOffset(years=n_seasons)]
+    return tiled.reset_index(drop=True)
+
+
+# copies of the history with distinct team names, standing in for other leagues
+def add_leagues(df, n_leagues):
+    frames = []
+    for i in range(n_leagues):
+        frame = df.copy()
+        frame["homeTeam"] = frame["homeTeam"] + f" L{i}"
+        frame["awayTeam"] = frame["awayTeam"] + f" L{i}"
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def best_time(fn, df):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(df.copy())
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+df = pd.read_csv(DATA_PATH)
+df["date"] = pd.to_datetime(df["date"], format="%d/%m/%Y %H:%M")
+
+columns = feature_columns()
+
+print(f"{'leagues':>8} {'seasons':>8} {'matches':>8} {'lambda (s)':>11} {'vectorized (s)':>15} {'speedup':>8}")
+
+cases = [(n_leagues, n_seasons) for n_leagues in LEAGUE_COUNTS for n_seasons in SEASON_COUNTS]
+
+for n_leagues, n_seasons in cases:
+    data = add_leagues(tile_seasons(df, n_seasons), n_leagues)
+
+    # outputs must match the reference exactly
+    pd.testing.assert_frame_equal(
+        build_features(data.copy())[columns],
+        build_features_reference(data.copy())[columns],
+        check_exact=True,
+    )
+
+    reference = best_time(build_features_reference, data)
+    vectorized = best_time(build_features, data)
+
+    print(f"{n_leagues:>8} {n_seasons:>8} {len(data):>8} {reference:>11.4f} {vectorized:>15.4f} {reference / vectorized:>7.1f}x")
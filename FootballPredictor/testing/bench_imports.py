@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import time
+
+# give root path to  file
+project_root = os.path.abspath(os.path.join(os.getcwd(), ".."))
+
+# modules timed in a fresh interpreter each (imports are cached within a process)
+MODULES = ["simulate", "main", "models.poisson", "models.random_forest", "utils.match_store", "utils.api_client"]
+
+# end-to-end commands: first prediction from a cold start
+COMMANDS = [
+    ["main.py", "predict-fixture", "Arsenal", "Chelsea", "--model", "poisson"],
+    ["main.py", "predict-fixture", "Arsenal", "Chelsea", "--model", "random_forest"],
+]
+
+REPEATS = 5
+
+
+def best_time(args):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=project_root, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+baseline = best_time(["-c", "pass"])
+print(f"interpreter startup: {baseline:.3f}s\n")
+
+print(f"{'import':<28} {'time (s)':>9}")
+for module in MODULES:
+    print(f"{module:<28} {best_time(['-c', f'import {module}']) - baseline:>9.3f}")
+
+print(f"\n{'command':<60} {'time (s)':>9}")
+for command in COMMANDS:
+    print(f"{' '.join(command):<60} {best_time(command):>9.3f}")
@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+# give root path to  file
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backtest import run_backtest, summarize
+from models import random_forest, random_forest_joint
+from models.random_forest import FEATURES, HYPERPARAMS
+from simulate import get_model
+from utils.match_store import load_matches
+
+# the current home/away forest pair against the single multi-output forest
+MODELS = {"random_forest": random_forest, "random_forest_joint": random_forest_joint}
+
+LATENCY_REPEATS = 200
+
+# backtest retrains every fold, so steps are coarser than backtest.py's weekly default
+STEP_DAYS = 28
+
+
+# seconds to fit on the full history and compressed artifact size (as saved by the registry)
+def fit_and_size(module, data):
+    start = time.perf_counter()
+    models = module._fit(data, HYPERPARAMS)
+    fit_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.joblib")
+        joblib.dump(models, path, compress=3)
+        size_mb = os.path.getsize(path) / 1e6
+    return fit_seconds, size_mb
+
+
+# median single-fixture latency and one batch over every team pairing, warm caches
+def latency(model_name, df):
+    model = get_model(model_name)
+    teams = sorted(set(df["homeTeam"].astype(str).iloc[-380:]))
+    home_teams = np.array([h for h in teams for a in teams if h != a])
+    away_teams = np.array([a for h in teams for a in teams if h != a])
+
+    model.expected_goals(teams[0], teams[1], df)
+    timings = []
+    for i in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        model.expected_goals(home_teams[i % len(home_teams)], away_teams[i % len(away_teams)], df)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.expected_goals_batch(home_teams, away_teams, df)
+    return float(np.median(timings)) * 1000, (time.perf_counter() - start) * 1000, len(home_teams)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Two random forests vs one multi-output forest")
+    parser.add_argument("--step-days", type=int, default=STEP_DAYS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--skip-backtest", action="store_true")
+    args = parser.parse_args()
+
+    df = load_matches()
+    data = random_forest.feature_store(df).features[FEATURES + ["homeGoals", "awayGoals"]]
+
+    rows = {}
+    for model_name, module in MODELS.items():
+        fit_seconds, size_mb = fit_and_size(module, data)
+        single_ms, batch_ms, n_fixtures = latency(model_name, df)
+        rows[model_name] = {"fit_s": fit_seconds, "size_mb": size_mb, "predict_ms": single_ms, "batch_ms": batch_ms}
+
+    if not args.skip_backtest:
+        folds = run_backtest(df, list(MODELS), args.step_days, workers=args.workers)
+        summary = summarize(folds)
+        for model_name in MODELS:
+            rows[model_name].update(summary.loc[model_name, ["accuracy", "brier", "log_loss"]].to_dict())
+
+    print(f"{len(data)} training matches, {HYPERPARAMS['n_estimators']} trees, batch of {n_fixtures} fixtures\n")
+    columns = list(next(iter(rows.values())))
+    print(f"{'model':<22}" + "".join(f"{c:>12}" for c in columns))
+    for model_name, row in rows.items():
+        print(f"{model_name:<22}" + "".join(f"{row[c]:>12.4f}" for c in columns))
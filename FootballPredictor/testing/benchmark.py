@@ -0,0 +1,285 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# give root path to  file
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import poisson, random_forest
+from models.dixon_coles import DixonColes
+from models.features import build_features
+from simulate import simulate_match
+from stub_api import start_stub_server
+from utils import data_updater, match_store, name_mapping
+from utils.match_store import DEFAULT_COMPETITION, to_typed
+from utils.prediction_storage import save_prediction
+
+# one result file per commit, compared with --baseline
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "benchmarks")
+
+# (teams per league, seasons, leagues)
+SCALES = [(20, 3, 1), (20, 10, 1), (20, 10, 5)]
+
+BENCHMARKS = [
+    "build_features", "train_poisson", "train_random_forest", "train_dixon_coles",
+    "poisson_predict", "simulate_match", "append_new_matches", "save_prediction",
+]
+
+# whole-frame operations keep their best of REPEATS, per-call ones the median of CALLS
+REPEATS = 3
+CALLS = 200
+
+# rounds of the last season held back from the store and served by the stub api
+NEW_ROUNDS = 2
+
+# slower than the baseline by more than this factor counts as a regression
+REGRESSION_THRESHOLD = 1.25
+
+START_YEAR = 2000
+
+
+# double round robin (circle method): 2 * (n - 1) rounds of (home, away) index pairs
+def round_robin(n_teams):
+    teams = list(range(n_teams))
+    rounds = []
+    for _ in range(n_teams - 1):
+        rounds.append([(teams[i], teams[-1 - i]) for i in range(n_teams // 2)])
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds + [[(away, home) for home, away in pairings] for pairings in rounds]
+
+
+# poisson goals from per-team attack/defence ratings that drift between seasons.
+# league 0 uses the default competition code, so the api/store code paths see it as live data
+def synthetic_history(n_teams=20, n_seasons=10, n_leagues=1, seed=0):
+    rng = np.random.default_rng(seed)
+    rounds = round_robin(n_teams)
+    frames = []
+
+    for league in range(n_leagues):
+        names = np.array([f"L{league} Team {i:02d}" for i in range(n_teams)])
+        attack = rng.normal(0, 0.3, n_teams)
+        defence = rng.normal(0, 0.3, n_teams)
+
+        for season in range(n_seasons):
+            attack += rng.normal(0, 0.1, n_teams)
+            defence += rng.normal(0, 0.1, n_teams)
+
+            # one round per week, saturday 15:00 from mid-august
+            first = pd.Timestamp(f"{START_YEAR + season}-08-10 15:00")
+            pairs = np.array([pair for pairings in rounds for pair in pairings])
+            round_index = np.repeat(np.arange(len(rounds)), n_teams // 2)
+            home, away = pairs[:, 0], pairs[:, 1]
+
+            frames.append(pd.DataFrame({
+                "date": first + pd.to_timedelta(round_index * 7, unit="D"),
+                "homeTeam": names[home],
+                "awayTeam": names[away],
+                "homeGoals": rng.poisson(np.exp(0.15 + 0.25 + attack[home] - defence[away])),
+                "awayGoals": rng.poisson(np.exp(0.15 + attack[away] - defence[home])),
+                "round": round_index + 1,
+                "competition": DEFAULT_COMPETITION if league == 0 else f"L{league}",
+            }))
+
+    df = to_typed(pd.concat(frames, ignore_index=True))
+    return df.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+# football-data.org style payloads for the stub api
+def api_payloads(df):
+    return [{
+        "id": i + 1,
+        "competition": {"code": str(row.competition)},
+        "matchday": int(row.round),
+        "utcDate": row.date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "status": "FINISHED",
+        "homeTeam": {"id": None, "name": str(row.homeTeam)},
+        "awayTeam": {"id": None, "name": str(row.awayTeam)},
+        "score": {"fullTime": {"home": int(row.homeGoals), "away": int(row.awayGoals)}},
+    } for i, row in enumerate(df.itertuples(index=False))]
+
+
+# point the match store, update timestamp and learned team ids at a scratch directory
+@contextlib.contextmanager
+def scratch_data_dir(path):
+    targets = [
+        (match_store, "DATA_DIR", path),
+        (match_store, "STORE_DIR", os.path.join(path, "matches")),
+        (match_store, "HISTORICAL_CSV", os.path.join(path, "historical_matches.csv")),
+        (match_store, "KEY_INDEX_FILE", os.path.join(path, "historical_matches.keys")),
+        (data_updater, "LAST_UPDATE_FILE", os.path.join(path, "last_update.txt")),
+        (name_mapping, "LEARNED_TEAM_IDS_FILE", os.path.join(path, "team_ids.json")),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in targets]
+    for module, name, value in targets:
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+def best_time(fn, repeats=REPEATS):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def median_call(fn, args_list):
+    times = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def random_pairs(df, n, seed=0):
+    rng = np.random.default_rng(seed)
+    teams = df["homeTeam"].astype(str).unique()
+    return [tuple(rng.choice(teams, 2, replace=False)) for _ in range(n)]
+
+
+# append_new_matches against the stub: the store holds everything except the last
+# NEW_ROUNDS rounds of the default competition, which the api reports as finished
+def time_append(df):
+    live = df[df["competition"] == DEFAULT_COMPETITION]
+    last_season = live[match_store.season_of(live["date"]) == match_store.season_of(live["date"]).max()]
+    new = last_season[last_season["round"] > last_season["round"].max() - NEW_ROUNDS]
+
+    server, url = start_stub_server(api_payloads(last_season))
+    os.environ["FOOTBALL_API_URL"] = url
+    try:
+        with tempfile.TemporaryDirectory() as tmp, scratch_data_dir(tmp), contextlib.redirect_stdout(io.StringIO()):
+            for competition, rows in df.drop(new.index).groupby("competition", observed=True):
+                match_store.append_matches(rows, competition)
+
+            start = time.perf_counter()
+            added = data_updater.append_new_matches("benchmark")
+            seconds = time.perf_counter() - start
+    finally:
+        os.environ.pop("FOOTBALL_API_URL")
+        server.shutdown()
+
+    if len(added) != len(new):
+        raise RuntimeError(f"append_new_matches added {len(added)} matches, expected {len(new)}")
+    return seconds
+
+
+def run_scale(df, benchmarks):
+    results = {}
+    pairs = random_pairs(df, CALLS)
+
+    if "build_features" in benchmarks:
+        results["build_features"] = best_time(lambda: build_features(df.copy()))
+    if "train_poisson" in benchmarks:
+        results["train_poisson"] = best_time(lambda: poisson.TeamStrength.from_matches(df))
+    if "train_random_forest" in benchmarks:
+        data = build_features(df.copy())[random_forest.FEATURES + ["homeGoals", "awayGoals"]]
+        results["train_random_forest"] = best_time(lambda: random_forest._fit(data, random_forest.HYPERPARAMS), 1)
+    if "train_dixon_coles" in benchmarks:
+        results["train_dixon_coles"] = best_time(lambda: DixonColes.from_matches(df), 1)
+    if "poisson_predict" in benchmarks:
+        poisson.predict(*pairs[0], df)
+        results["poisson_predict"] = median_call(poisson.predict, [(home, away, df) for home, away in pairs])
+    if "simulate_match" in benchmarks:
+        simulate_match("poisson", *pairs[0], df)
+        results["simulate_match"] = median_call(
+            simulate_match, [("poisson", home, away, df, 1000, "batch") for home, away in pairs]
+        )
+    if "append_new_matches" in benchmarks:
+        results["append_new_matches"] = time_append(df)
+    if "save_prediction" in benchmarks:
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            path = os.path.join(tmp, "predictions.jsonl")
+            results["save_prediction"] = median_call(save_prediction, [
+                ("poisson", home, away, "1-1", "2025-01-01T15:00:00Z",
+                 {"home_win": 0.4, "draw": 0.3, "away_win": 0.3}, 0.12, (1.4, 1.1), path)
+                for home, away in pairs
+            ])
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def results_path(revision):
+    return os.path.join(RESULTS_DIR, f"{revision}.json")
+
+
+# (scale, benchmark) rows slower than the baseline by more than the threshold
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    before = {(row["scale"], row["benchmark"]): row["seconds"] for row in baseline["results"]}
+    rows = []
+    for row in current["results"]:
+        previous = before.get((row["scale"], row["benchmark"]))
+        if previous:
+            ratio = row["seconds"] / previous
+            rows.append({**row, "baseline": previous, "ratio": ratio, "regression": ratio > threshold})
+    return pd.DataFrame(rows)
+
+
+def _scale(value):
+    teams, seasons, leagues = (int(part) for part in value.split("x"))
+    return teams, seasons, leagues
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks on synthetic match histories")
+    parser.add_argument("--scales", nargs="+", type=_scale, default=SCALES, help="TEAMSxSEASONSxLEAGUES, e.g. 20x10x5")
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--baseline", help="revision (results file name) to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--no-save", action="store_true", help="don't store the results for this revision")
+    args = parser.parse_args()
+
+    revision = git_revision()
+    current = {
+        "revision": revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "results": [],
+    }
+
+    for teams, seasons, leagues in args.scales:
+        df = synthetic_history(teams, seasons, leagues)
+        scale = f"{teams}x{seasons}x{leagues}"
+        for benchmark, seconds in run_scale(df, args.benchmarks).items():
+            current["results"].append({"scale": scale, "matches": len(df), "benchmark": benchmark, "seconds": seconds})
+            print(f"{scale:>10} {len(df):>8} {benchmark:<20} {seconds * 1000:>12.3f} ms", flush=True)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(results_path(revision), "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nResults saved to {results_path(revision)}")
+
+    if args.baseline:
+        with open(results_path(args.baseline), "r") as f:
+            comparison = compare(current, json.load(f), args.threshold)
+
+        print(f"\nAgainst {args.baseline}:")
+        comparison["baseline_ms"] = comparison["baseline"] * 1000
+        comparison["ms"] = comparison["seconds"] * 1000
+        print(comparison[["scale", "benchmark", "baseline_ms", "ms", "ratio", "regression"]].round(3).to_string(index=False))
+        if comparison["regression"].any():
+            sys.exit(1)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import sys
 import os
@@ -5,18 +6,16 @@ import os
 # give root path to  file
 project_root = os.path.abspath(os.path.join(os.getcwd(), ".."))
 sys.path.append(project_root)
-from simulate import simulate_match
+from simulate import simulate_fixtures
+from utils.match_store import load_matches
 
-DATA_PATH = "../data/historical_matches.csv"
 TEST_PERIOD_DAYS = 90  # games of last 3 months
 
-# MonteCarlo settings
-N_POISSON = 100
-N_RF = 10  # RandomForest much slower, hence fewer simulation
+# exact score matrices instead of MonteCarlo, so results are reproducible
+SIMULATION_MODE = "exact"
 
 # load dataset
-df = pd.read_csv(DATA_PATH)
-df["date"] = pd.to_datetime(df["date"], format="%d/%m/%Y %H:%M")
+df = load_matches()
 
 # split data into train/test
 split_date = df["date"].max() - pd.Timedelta(days=TEST_PERIOD_DAYS)
@@ -26,49 +25,29 @@ test_df = df[df["date"] > split_date].copy()
 print(f"Training on {len(train_df)} matches, testing on {len(test_df)} matches.")
 
 # evaluate function
-def evaluate_model(model_name, n_simulations):
-    outcome_correct = 0
-    score_correct = 0
-    goal_mae = 0
+def evaluate_model(model_name, mode=SIMULATION_MODE):
     total_matches = len(test_df)
 
-    for idx, row in test_df.iterrows():
-        home = row["homeTeam"]
-        away = row["awayTeam"]
-        real_home_goals = row["homeGoals"]
-        real_away_goals = row["awayGoals"]
-
-        result = simulate_match(
-            model_name=model_name,
-            home_team=home,
-            away_team=away,
-            df=train_df,
-            n_simulations=n_simulations
-        )
-
-        # predicted outcome
-        pred_score = result["top_score"]
-        pred_home, pred_away = map(int, pred_score.split("-"))
-
-        # Outcome (H/D/A)
-        real_outcome = (
-            "H" if real_home_goals > real_away_goals else
-            "A" if real_home_goals < real_away_goals else
-            "D"
-        )
-        pred_outcome = (
-            "H" if pred_home > pred_away else
-            "A" if pred_home < pred_away else
-            "D"
-        )
-
-        if real_outcome == pred_outcome:
-            outcome_correct += 1
-        if (real_home_goals, real_away_goals) == (pred_home, pred_away):
-            score_correct += 1
-
-        # MAE on goals
-        goal_mae += abs(real_home_goals - pred_home) + abs(real_away_goals - pred_away)
+    # one batched prediction over the whole test set
+    result = simulate_fixtures(model_name, test_df, train_df, mode=mode)
+
+    # predicted outcome
+    pred_scores = result["top_score"].str.split("-", expand=True).astype(int)
+    pred_home = pred_scores[0]
+    pred_away = pred_scores[1]
+
+    real_home_goals = test_df["homeGoals"]
+    real_away_goals = test_df["awayGoals"]
+
+    # Outcome (H/D/A), as the sign of the goal difference
+    real_outcome = np.sign(real_home_goals - real_away_goals)
+    pred_outcome = np.sign(pred_home - pred_away)
+
+    outcome_correct = (real_outcome == pred_outcome).sum()
+    score_correct = ((real_home_goals == pred_home) & (real_away_goals == pred_away)).sum()
+
+    # MAE on goals
+    goal_mae = (real_home_goals - pred_home).abs().sum() + (real_away_goals - pred_away).abs().sum()
 
     outcome_acc = outcome_correct / total_matches
     score_acc = score_correct / total_matches
@@ -85,13 +64,19 @@ def evaluate_model(model_name, n_simulations):
 
 # running evaluation
 print("Evaluating Poisson...")
-poisson_results = evaluate_model("poisson", n_simulations=N_POISSON)
+poisson_results = evaluate_model("poisson")
 
 print("Evaluating Random Forest...")
-rf_results = evaluate_model("random_forest", n_simulations=N_RF)
+rf_results = evaluate_model("random_forest")
+
+print("Evaluating joint Random Forest...")
+rf_joint_results = evaluate_model("random_forest_joint")
+
+print("Evaluating Dixon-Coles...")
+dc_results = evaluate_model("dixon_coles")
 
 # print out summary
-for res in [poisson_results, rf_results]:
+for res in [poisson_results, rf_results, rf_joint_results, dc_results]:
     print(f"\nModel: {res['model']}")
     print(f"Matches evaluated: {res['matches']}")
     print(f"Outcome accuracy: {res['outcome_accuracy']:.2%}")
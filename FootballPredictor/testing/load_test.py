@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# give root path to  file
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service import start_service
+
+TEAMS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "teams.json")
+
+
+def post(url, payload):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+# random fixtures between teams in config/teams.json
+def random_fixtures(n, rng):
+    with open(TEAMS_FILE, "r") as f:
+        teams = list(json.load(f).values())
+    return [dict(zip(("home_team", "away_team"), rng.sample(teams, 2))) for _ in range(n)]
+
+
+# fire n_requests from `concurrency` client threads; returns per-request latencies and wall time
+def run_load(url, model, n_requests, concurrency, batch_size, seed=0):
+    rng = random.Random(seed)
+    fixtures = random_fixtures(n_requests * batch_size, rng)
+
+    if batch_size == 1:
+        endpoint = f"{url}/predict"
+        payloads = [{"model": model, **fixture} for fixture in fixtures]
+    else:
+        endpoint = f"{url}/predict/batch"
+        payloads = [
+            {"model": model, "fixtures": fixtures[i:i + batch_size]}
+            for i in range(0, len(fixtures), batch_size)
+        ]
+
+    def timed(payload):
+        start = time.perf_counter()
+        post(endpoint, payload)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, payloads))
+    return np.array(latencies), time.perf_counter() - start
+
+
+def report(latencies, elapsed, batch_size):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"requests:   {len(latencies)} ({len(latencies) * batch_size} fixtures)")
+    print(f"latency:    p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {latencies.max() * 1000:.1f} ms")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s, {len(latencies) * batch_size / elapsed:.1f} fixtures/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the prediction service")
+    parser.add_argument("--url", help="running service (default: start one in-process)")
+    parser.add_argument("--model", default="poisson")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=1, help="fixtures per request (>1 uses /predict/batch)")
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        server, url = start_service([args.model], port=0, reload_seconds=0)
+
+    # warm-up request, not counted
+    post(f"{url}/predict", {"model": args.model, "home_team": "Arsenal", "away_team": "Chelsea"})
+
+    latencies, elapsed = run_load(url, args.model, args.requests, args.concurrency, args.batch_size)
+    report(latencies, elapsed, args.batch_size)
@@ -0,0 +1,165 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+import pandas as pd
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# give root path to  file
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.bulk_import import raw_kickoffs_utc, read_season_file, season_files
+from utils.name_mapping import normalize_team_name
+
+TEAMS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "teams.json")
+
+
+# football-data.org style match payloads built from the raw season file
+def load_stub_matches(path=None):
+    path = path or season_files()[-1]
+    df = pd.concat(read_season_file(path), ignore_index=True)
+    df["date"] = raw_kickoffs_utc(df["date"]).dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    with open(TEAMS_FILE, "r") as f:
+        team_ids = {normalize_team_name(name): int(team_id) for team_id, name in json.load(f).items()}
+
+    matches = []
+    for i, row in enumerate(df.itertuples(index=False)):
+        finished = not pd.isna(row.homeGoals)
+        matches.append({
+            "id": i + 1,
+            "competition": {"code": "PL"},
+            "matchday": int(row.round),
+            "utcDate": row.date,
+            "status": "FINISHED" if finished else "SCHEDULED",
+            "homeTeam": {"id": team_ids.get(row.homeTeam), "name": row.homeTeam},
+            "awayTeam": {"id": team_ids.get(row.awayTeam), "name": row.awayTeam},
+            "score": {"fullTime": {
+                "home": int(row.homeGoals) if finished else None,
+                "away": int(row.awayGoals) if finished else None,
+            }},
+        })
+    return matches
+
+
+# local stand-in for the football-data.org v4 endpoints used by the project.
+# supports status/limit/competitions filters, ETag + If-Modified-Since revalidation,
+# an optional per-minute quota answered with 429s and queued failure responses.
+# every response status is recorded in `log`
+class StubApiHandler(BaseHTTPRequestHandler):
+    matches = []
+    requests_per_minute = None
+    window_seconds = 60
+    request_times = []
+    failures = []
+    log = []
+    lock = threading.Lock()
+    last_modified = formatdate(usegmt=True)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        # injected failures are answered first, in order: (status, headers)
+        with self.lock:
+            failure = self.failures.pop(0) if self.failures else None
+        if failure is not None:
+            status, headers = failure
+            return self._send(status, {"message": "injected failure"}, headers)
+
+        reset = self._quota_reset()
+        if reset is not None:
+            return self._send(429, {"message": "quota exceeded"}, {"X-RequestCounter-Reset": str(reset)})
+
+        team = re.fullmatch(r"/v4/teams/(\d+)/matches", url.path)
+        competition = re.fullmatch(r"/v4/competitions/(\w+)/matches", url.path)
+
+        if team:
+            team_id = int(team.group(1))
+            matches = [m for m in self.matches if team_id in (m["homeTeam"]["id"], m["awayTeam"]["id"])]
+        elif competition:
+            matches = [m for m in self.matches if m["competition"]["code"] == competition.group(1)]
+        else:
+            return self._send(404, {"message": "not found"})
+
+        if "competitions" in params:
+            matches = [m for m in matches if m["competition"]["code"] in params["competitions"].split(",")]
+        if "status" in params:
+            matches = [m for m in matches if m["status"] in params["status"].split(",")]
+        matches = sorted(matches, key=lambda m: m["utcDate"])
+        if "limit" in params:
+            matches = matches[:int(params["limit"])]
+
+        body = json.dumps({"matches": matches}).encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+
+        if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == self.last_modified:
+            return self._send(304, None, {"ETag": etag})
+
+        self._send(200, body, {"ETag": etag, "Last-Modified": self.last_modified})
+
+    # seconds until the quota window frees a slot, or None if the request is allowed
+    def _quota_reset(self):
+        if not self.requests_per_minute:
+            return None
+        with self.lock:
+            now = time.monotonic()
+            self.request_times[:] = [t for t in self.request_times if now - t < self.window_seconds]
+            if len(self.request_times) >= self.requests_per_minute:
+                return max(1, math.ceil(self.request_times[0] + self.window_seconds - now))
+            self.request_times.append(now)
+            return None
+
+    def _send(self, status, body, headers=None):
+        self.log.append(status)
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# start the stub in a background thread; returns (server, base url for FOOTBALL_API_URL).
+# the handler class (with its failure queue and response log) is server.RequestHandlerClass
+def start_stub_server(matches=None, port=0, requests_per_minute=None, window_seconds=60, failures=None):
+    handler = type("Handler", (StubApiHandler,), {
+        "matches": load_stub_matches() if matches is None else matches,
+        "requests_per_minute": requests_per_minute,
+        "window_seconds": window_seconds,
+        "request_times": [],
+        "failures": list(failures or []),
+        "log": [],
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v4"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local football-data.org stub")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests-per-minute", type=int, default=None)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(port=args.port, requests_per_minute=args.requests_per_minute)
+    print(f"Serving stub API on {url} (set FOOTBALL_API_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,126 @@
+import asyncio
+import time
+import pytest
+from stub_api import load_stub_matches, start_stub_server
+from utils import api_client
+from utils.api_client import ApiError, FootballDataClient, TokenBucket
+
+MATCHES = [{
+    "id": 1,
+    "competition": {"code": "PL"},
+    "matchday": 1,
+    "utcDate": "2025-08-16T14:00:00Z",
+    "status": "FINISHED",
+    "homeTeam": {"id": 57, "name": "Arsenal FC"},
+    "awayTeam": {"id": 61, "name": "Chelsea FC"},
+    "score": {"fullTime": {"home": 2, "away": 1}},
+}]
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    api_client._RESPONSE_CACHE.clear()
+    yield
+    api_client._RESPONSE_CACHE.clear()
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        server, url = start_stub_server(MATCHES, **kwargs)
+        servers.append(server)
+        return server.RequestHandlerClass, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def fetch(url, calls=1, **options):
+    options = {"bucket": TokenBucket(6000), "backoff_seconds": 0.01, **options}
+
+    async def run():
+        async with FootballDataClient("key", url, **options) as client:
+            return [await client.competition_matches("PL") for _ in range(calls)]
+
+    return asyncio.run(run())
+
+
+def test_retries_server_errors(stub):
+    handler, url = stub(failures=[(503, {}), (500, {})])
+    assert fetch(url) == [MATCHES]
+    assert handler.log == [503, 500, 200]
+
+
+def test_gives_up_after_max_retries(stub):
+    handler, url = stub(failures=[(502, {})] * 3)
+    with pytest.raises(ApiError) as error:
+        fetch(url, max_retries=2)
+    assert error.value.status == 502
+    assert handler.log == [502, 502, 502]
+
+
+def test_client_errors_are_not_retried(stub):
+    handler, url = stub(failures=[(403, {})])
+    with pytest.raises(ApiError):
+        fetch(url)
+    assert handler.log == [403]
+
+
+def test_429_waits_for_retry_after(stub):
+    handler, url = stub(failures=[(429, {"Retry-After": "1"})])
+    start = time.monotonic()
+    assert fetch(url, backoff_seconds=0) == [MATCHES]
+    assert time.monotonic() - start >= 1.0
+    assert handler.log == [429, 200]
+
+
+def test_etag_revalidation_returns_cached_payload(stub):
+    handler, url = stub()
+    assert fetch(url, calls=2) == [MATCHES, MATCHES]
+    assert handler.log == [200, 304]
+
+
+def test_if_modified_since_revalidation(stub):
+    handler, url = stub()
+    fetch(url)
+    for cached in api_client._RESPONSE_CACHE.values():
+        cached["etag"] = None
+
+    assert fetch(url) == [MATCHES]
+    assert handler.log == [200, 304]
+
+
+def test_token_bucket_bursts_then_waits():
+    bucket = TokenBucket(requests_per_minute=60, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve() == pytest.approx(2.0, abs=0.05)
+
+
+def test_token_bucket_limits_request_rate():
+    bucket = TokenBucket(requests_per_minute=600, capacity=1)
+
+    async def acquire_all():
+        for _ in range(4):
+            await bucket.acquire()
+
+    start = time.monotonic()
+    asyncio.run(acquire_all())
+    assert time.monotonic() - start >= 0.3 - 0.01
+
+
+# the stub serves raw season files with utc kickoffs, like the real api
+def test_stub_matches_are_utc(tmp_path):
+    path = tmp_path / "season.csv"
+    path.write_text(
+        "Match Number,Round Number,Date,Location,Home Team,Away Team,Result\n"
+        "1,1,16/08/2025 15:00,Emirates Stadium,Arsenal,Chelsea,2 - 1\n"
+        "2,20,27/12/2025 15:00,Stamford Bridge,Chelsea,Arsenal,\n"
+    )
+    matches = load_stub_matches(str(path))
+    assert [m["utcDate"] for m in matches] == ["2025-08-16T14:00:00Z", "2025-12-27T15:00:00Z"]
@@ -0,0 +1,29 @@
+import pandas as pd
+from utils.bulk_import import read_season_file
+
+HEADER = "Match Number,Round Number,Date,Location,Home Team,Away Team,Result\n"
+
+
+def write_season_file(path, results):
+    rows = [f"{i + 1},1,16/08/2025 15:00,Ground,Arsenal,Chelsea,{result}\n" for i, result in enumerate(results)]
+    path.write_text(HEADER + "".join(rows))
+    return str(path)
+
+
+# a file downloaded before the season starts has no results at all
+def test_season_file_without_results(tmp_path):
+    path = write_season_file(tmp_path / "season.csv", ["", "", ""])
+
+    chunk = pd.concat(read_season_file(path), ignore_index=True)
+    assert len(chunk) == 3
+    assert chunk["homeGoals"].isna().all() and chunk["awayGoals"].isna().all()
+
+
+# a chunk made only of unplayed rows after a chunk of results
+def test_chunk_of_unplayed_rows(tmp_path):
+    path = write_season_file(tmp_path / "season.csv", ["3 - 1", "0 - 0", "", ""])
+
+    chunks = list(read_season_file(path, chunk_size=2))
+    assert chunks[0]["homeGoals"].tolist() == [3, 0]
+    assert chunks[0]["awayGoals"].tolist() == [1, 0]
+    assert chunks[1]["homeGoals"].isna().all()
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from models.dixon_coles import DixonColes, HOME, MU, N_FIXED, RHO
+
+
+# a fitted model with two teams and the given log rates and rho
+def model(log_home_rate, log_away_rate, rho):
+    dc = DixonColes()
+    dc.teams = {"Home": 0, "Away": 1}
+    dc.params = np.zeros(N_FIXED + 4)
+    dc.params[MU] = log_away_rate
+    dc.params[HOME] = log_home_rate - log_away_rate
+    dc.params[RHO] = rho
+    dc.fitted = True
+    return dc
+
+
+# rates where an uncorrected tau factor is negative: lam * mu > 5 with rho > 0, large lam with rho < 0
+@pytest.mark.parametrize("home_rate, away_rate, rho", [(3.0, 2.5, 0.2), (6.0, 1.0, -0.2)])
+def test_score_matrices_are_distributions(home_rate, away_rate, rho):
+    dc = model(np.log(home_rate), np.log(away_rate), rho)
+    matrix = dc.score_matrices(["Home"], ["Away"])[0]
+
+    assert (matrix >= 0).all()
+    np.testing.assert_allclose(matrix.sum(), 1.0)
+    np.random.choice(matrix.size, p=matrix.ravel())
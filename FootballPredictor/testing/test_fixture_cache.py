@@ -0,0 +1,23 @@
+from utils.fixture_cache import FixtureCache
+
+
+def scheduled(match_id, home_id, away_id, utc_date="2099-01-01T15:00:00Z"):
+    return {
+        "id": match_id,
+        "utcDate": utc_date,
+        "homeTeam": {"id": home_id, "name": f"Team {home_id}"},
+        "awayTeam": {"id": away_id, "name": f"Team {away_id}"},
+    }
+
+
+def test_refill_keeps_competition(tmp_path):
+    cache = FixtureCache(str(tmp_path / "fixtures.sqlite"))
+    fixture = cache.next_fixture(1, fetch=lambda: [scheduled(10, 1, 2)], competition="SA")
+
+    assert fixture == {"home": "Team 1", "away": "Team 2", "date": "2099-01-01T15:00:00Z"}
+    assert cache.conn.execute("SELECT competition FROM fixtures").fetchall() == [("SA",)]
+
+    # a fresh refill of one competition doesn't stop another from refilling
+    fixture = cache.next_fixture(3, fetch=lambda: [scheduled(11, 3, 4)], competition="PL")
+    assert fixture["home"] == "Team 3"
+    cache.close()
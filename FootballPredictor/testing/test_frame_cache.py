@@ -0,0 +1,52 @@
+import pandas as pd
+from utils.frame_cache import FrameCache
+
+
+def frame(goals):
+    return pd.DataFrame({
+        "homeTeam": ["A", "B", "C", "D"][:len(goals)],
+        "awayTeam": ["B", "C", "D", "A"][:len(goals)],
+        "homeGoals": goals,
+    })
+
+
+def counting_cache():
+    calls = {"build": 0, "extend": 0}
+
+    def build(df):
+        calls["build"] += 1
+        return int(df["homeGoals"].sum())
+
+    def extend(value, new_rows):
+        calls["extend"] += 1
+        return value + int(new_rows["homeGoals"].sum())
+
+    return FrameCache(build, extend), calls
+
+
+def test_appended_rows_extend():
+    cache, calls = counting_cache()
+    df = frame([1, 2, 3])
+    assert cache.get(df) == 6
+    assert cache.get(df) == 6
+    assert cache.get(frame([1, 2, 3, 4])) == 10
+    assert calls == {"build": 1, "extend": 1}
+
+
+# same length and first/last rows, different middle row
+def test_changed_middle_row_rebuilds():
+    cache, calls = counting_cache()
+    assert cache.get(frame([1, 2, 3])) == 6
+    assert cache.get(frame([1, 5, 3])) == 9
+    assert calls == {"build": 2, "extend": 0}
+
+
+def test_edited_copy_rebuilds():
+    cache, calls = counting_cache()
+    df = frame([1, 2, 3, 4])
+    cache.get(df)
+
+    edited = df.copy()
+    edited.loc[1, "homeGoals"] = 7
+    assert cache.get(edited) == 15
+    assert calls["build"] == 2
@@ -0,0 +1,34 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from utils import instrumentation
+
+
+def _work(n):
+    with instrumentation.stage("work"):
+        instrumentation.count("items", n)
+    return n * 2
+
+
+def _inherited(_):
+    return instrumentation.enabled()
+
+
+# worker stages and counters end up in the parent's report, under the parent's stage
+def test_pool_worker_totals_are_merged(tmp_path):
+    with instrumentation.run(["test"], "timers", str(tmp_path)):
+        with instrumentation.stage("backtest"):
+            with ProcessPoolExecutor(max_workers=2, initializer=instrumentation.init_worker,
+                                     initargs=(instrumentation.worker_state(),)) as pool:
+                results = instrumentation.map_collected(pool, _work, [1, 2, 3, 4])
+
+    assert results == [2, 4, 6, 8]
+    report = json.load(open(next(tmp_path.glob("run-*.json"))))
+    assert report["stages"]["backtest/work"]["calls"] == 4
+    assert report["counters"] == {"items": 10}
+
+
+# workers given no state drop the run they inherit through fork
+def test_workers_drop_the_inherited_run(tmp_path):
+    with instrumentation.run(["test"], "timers", str(tmp_path)):
+        with ProcessPoolExecutor(max_workers=1, initializer=instrumentation.init_worker, initargs=(None,)) as pool:
+            assert instrumentation.map_collected(pool, _inherited, [0]) == [False]
@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+import main
+from utils.match_store import MATCH_COLUMNS, concat_matches, to_typed
+
+
+def season_file_rows(dates):
+    return [pd.DataFrame({
+        "round": [38] * len(dates),
+        "date": dates,
+        "homeTeam": ["Arsenal FC"] * len(dates),
+        "awayTeam": ["Chelsea FC"] * len(dates),
+        "homeGoals": [None] * len(dates),
+        "awayGoals": [None] * len(dates),
+    })]
+
+
+# season files hold uk local times: bst kickoffs are an hour ahead of utc, gmt ones aren't
+def test_raw_round_fixtures_are_utc(monkeypatch):
+    monkeypatch.setattr(main, "season_files", lambda: ["season.json"])
+    monkeypatch.setattr(main, "read_season_file", lambda path: season_file_rows(["24/05/2099 16:00", "24/12/2099 15:00"]))
+    monkeypatch.setattr(main, "df", pd.DataFrame({"date": pd.to_datetime(["2025-01-01"])}))
+
+    fixtures = main.raw_round_fixtures(38)
+    assert fixtures["date"].tolist() == ["2099-05-24T15:00:00Z", "2099-12-24T15:00:00Z"]
+
+
+def refresh_with_store(monkeypatch, loaded):
+    from utils import data_updater
+
+    store = [to_typed(pd.DataFrame({
+        "date": pd.to_datetime(["2025-08-16", "2025-08-17"]),
+        "homeTeam": ["Arsenal FC", "Chelsea FC"], "awayTeam": ["Chelsea FC", "Arsenal FC"],
+        "homeGoals": [1, 2], "awayGoals": [0, 0],
+    }))]
+    # a team the loaded history has no category for
+    new_rows = to_typed(pd.DataFrame({
+        "date": pd.to_datetime(["2025-08-23"]), "homeTeam": ["Sunderland AFC"], "awayTeam": ["Arsenal FC"],
+        "homeGoals": [0], "awayGoals": [3],
+    }))
+
+    def append_new_matches(api_key, competition):
+        store[0] = concat_matches([store[0], new_rows])
+        return new_rows
+
+    monkeypatch.setattr(data_updater, "append_new_matches", append_new_matches)
+    monkeypatch.setattr(main, "load_matches", lambda competitions=None: store[0])
+    monkeypatch.setattr(main, "api_key", lambda: None)
+    monkeypatch.setattr(main, "score_new_results", lambda: 0)
+    monkeypatch.setattr(main, "df", store[0] if loaded else None)
+
+    main.refresh_matches()
+    return main.matches()
+
+
+# new rows are in memory exactly once, whether or not the history was loaded before the refresh
+def test_refresh_adds_new_rows_once(monkeypatch):
+    assert len(refresh_with_store(monkeypatch, loaded=True)) == 3
+    assert len(refresh_with_store(monkeypatch, loaded=False)) == 3
+
+
+# team columns stay categorical after new teams are appended in memory
+def test_refresh_keeps_team_columns_categorical(monkeypatch):
+    df = refresh_with_store(monkeypatch, loaded=True)
+    for column in ["homeTeam", "awayTeam", "competition"]:
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+    assert df["homeTeam"].tolist() == ["Arsenal FC", "Chelsea FC", "Sunderland AFC"]
+
+
+# an unknown or not yet ingested competition fails instead of printing nan predictions
+def test_predict_without_history_fails(monkeypatch, capsys):
+    monkeypatch.setattr(main, "load_matches", lambda competitions=None: to_typed(pd.DataFrame(columns=MATCH_COLUMNS)))
+    monkeypatch.setattr(main, "df", None)
+    monkeypatch.setattr(main, "COMPETITION", main.COMPETITION)
+
+    with pytest.raises(SystemExit) as exit_info:
+        main.main(["predict-fixture", "Arsenal", "Chelsea", "--competition", "XX"])
+    assert exit_info.value.code != 0
+    assert "no stored matches for XX" in capsys.readouterr().err
+
+
+# ingest --fixtures caches every scheduled match of the competition from one api call
+def test_ingest_prefetches_fixtures(monkeypatch, tmp_path, capsys):
+    from utils.fixture_cache import FixtureCache
+
+    scheduled = [{
+        "id": match_id, "utcDate": "2099-01-01T15:00:00Z",
+        "homeTeam": {"id": home_id, "name": "Arsenal FC"}, "awayTeam": {"id": away_id, "name": "Chelsea FC"},
+    } for match_id, home_id, away_id in [(1, 57, 61), (2, 61, 57)]]
+    cache = FixtureCache(str(tmp_path / "fixtures.sqlite"))
+
+    monkeypatch.setattr(main, "refresh_matches", lambda: None)
+    monkeypatch.setattr(main, "api_key", lambda: None)
+    monkeypatch.setattr(main, "fetch_scheduled_matches", lambda api_key: scheduled)
+    monkeypatch.setattr(main, "_FIXTURE_CACHE", cache)
+    monkeypatch.setattr(main, "COMPETITION", main.COMPETITION)
+
+    main.main(["ingest", "--fixtures"])
+    assert "Cached 2 upcoming fixtures" in capsys.readouterr().out
+    assert cache.lookup(57, now=0)["away"] == "Chelsea FC"
+    cache.close()
@@ -0,0 +1,41 @@
+import json
+import pandas as pd
+from utils import match_store
+from utils.prediction_scoring import load_state, model_scores, score_new_results
+from utils.prediction_storage import make_entry, save_predictions
+
+
+def write_results(path, rows):
+    pd.DataFrame(rows, columns=match_store.MATCH_COLUMNS).to_csv(path, index=False)
+
+
+def test_scores_every_competition(tmp_path, monkeypatch):
+    monkeypatch.setattr(match_store, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(match_store, "HISTORICAL_CSV", str(tmp_path / "historical_matches.csv"))
+    write_results(tmp_path / "historical_matches.csv", [("16/08/2025 15:00", "Arsenal FC", "Chelsea FC", 2, 0)])
+    write_results(tmp_path / "historical_matches_SA.csv", [("17/08/2025 18:00", "Inter", "Milan", 1, 1)])
+
+    predictions = str(tmp_path / "predictions.jsonl")
+    state = str(tmp_path / "scores.json")
+    save_predictions([
+        make_entry("poisson", "Arsenal FC", "Chelsea FC", "1-0", "2025-08-16T14:00:00Z",
+                   {"home_win": 0.6, "draw": 0.25, "away_win": 0.15}),
+        make_entry("poisson", "Inter", "Milan", "1-1", "2025-08-17T16:00:00Z",
+                   {"home_win": 0.3, "draw": 0.4, "away_win": 0.3}),
+    ], predictions)
+
+    assert score_new_results(state, predictions) == 2
+    assert model_scores(state)["poisson"]["accuracy"] == 1.0
+    assert load_state(state)["pending"] == []
+    assert set(load_state(state)["results_offsets"]) == {"PL", "SA"}
+
+    # nothing new on a second run
+    assert score_new_results(state, predictions) == 0
+
+
+def test_single_mirror_state_is_migrated(tmp_path):
+    path = tmp_path / "scores.json"
+    path.write_text(json.dumps({
+        "predictions_offset": 10, "results_offset": 42, "last_result_day": None, "pending": [], "models": {},
+    }))
+    assert load_state(str(path))["results_offsets"] == {"PL": 42}
@@ -0,0 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from models import random_forest, random_forest_joint
+from models.random_forest import FEATURES, training_jobs
+
+
+def training_data(n=60):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.random((n, len(FEATURES))), columns=FEATURES)
+    data["homeGoals"] = rng.poisson(1.5, n)
+    data["awayGoals"] = rng.poisson(1.1, n)
+    return data
+
+
+def fitted_jobs(module):
+    captured = []
+    fit = random_forest.RandomForestRegressor.fit
+
+    def recording_fit(self, X, y):
+        captured.append(self.n_jobs)
+        return fit(self, X, y)
+
+    random_forest.RandomForestRegressor.fit = recording_fit
+    try:
+        models = module._fit(training_data(), {"n_estimators": 5, "random_state": 0})
+    finally:
+        random_forest.RandomForestRegressor.fit = fit
+    return captured, models
+
+
+def _worker_jobs(module_name):
+    module = {"random_forest": random_forest, "random_forest_joint": random_forest_joint}[module_name]
+    return training_jobs(), fitted_jobs(module)[0]
+
+
+def test_single_process_training_uses_every_core():
+    assert training_jobs() == -1
+    captured, models = fitted_jobs(random_forest)
+    assert captured == [-1, -1]
+    assert [model.n_jobs for model in models] == [None, None]
+
+
+# pool workers fit single-threaded, so workers x threads stays at the core count
+def test_pool_workers_fit_single_threaded():
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        for module_name, expected in [("random_forest", [1, 1]), ("random_forest_joint", [1])]:
+            assert pool.submit(_worker_jobs, module_name).result() == (1, expected)
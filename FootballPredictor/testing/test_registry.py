@@ -0,0 +1,47 @@
+import os
+import pandas as pd
+from models import registry
+
+
+def make_artifacts(directory, n):
+    for i in range(n):
+        path = os.path.join(directory, f"model-{i}.joblib")
+        open(path, "w").close()
+        os.utime(path, (i, i))
+
+
+def test_prune_keeps_most_recent(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "MODEL_DIR", str(tmp_path))
+    make_artifacts(tmp_path, 5)
+    registry.prune_artifacts(2)
+    assert sorted(os.listdir(tmp_path)) == ["model-3.joblib", "model-4.joblib"]
+
+
+# another process removes an artifact between the listing and the stat
+def test_prune_tolerates_concurrent_removal(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "MODEL_DIR", str(tmp_path))
+    make_artifacts(tmp_path, 5)
+
+    getmtime = os.path.getmtime
+
+    def racing_getmtime(path):
+        if path.endswith("model-1.joblib"):
+            os.remove(path)
+        return getmtime(path)
+
+    monkeypatch.setattr(os.path, "getmtime", racing_getmtime)
+    registry.prune_artifacts(2)
+    assert sorted(os.listdir(tmp_path)) == ["model-3.joblib", "model-4.joblib"]
+
+
+def test_pruning_paused(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setenv(registry.PAUSE_PRUNING_ENV, "1")
+
+    def fail(*args):
+        raise AssertionError("pruned during a paused run")
+
+    monkeypatch.setattr(registry, "prune_artifacts", fail)
+    data = pd.DataFrame({"x": [1, 2]})
+    assert registry.load_or_train("test", data, {}, lambda data, params: {"fitted": True}) == {"fitted": True}
+    assert len(os.listdir(tmp_path)) == 1
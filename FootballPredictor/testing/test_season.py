@@ -0,0 +1,48 @@
+import pandas as pd
+import season
+
+TEAMS = ["Arsenal FC", "Chelsea FC", "Everton FC", "Fulham FC"]
+
+
+# last season's double round robin, all four teams, finished in may 2025
+def last_season():
+    pairs = [(home, away) for home in TEAMS for away in TEAMS if home != away]
+    return pd.DataFrame({
+        "date": pd.date_range("2024-09-01", periods=len(pairs), freq="W"),
+        "homeTeam": [home for home, _ in pairs],
+        "awayTeam": [away for _, away in pairs],
+        "homeGoals": [2] * len(pairs),
+        "awayGoals": [0] * len(pairs),
+    })
+
+
+def new_season_fixtures():
+    pairs = [(home, away) for home in TEAMS for away in TEAMS if home != away]
+    return pd.DataFrame({
+        "date": pd.date_range("2025-08-16", periods=len(pairs), freq="W"),
+        "homeTeam": [home for home, _ in pairs],
+        "awayTeam": [away for _, away in pairs],
+    })
+
+
+# between seasons the store ends with last season, which must not count as played
+def test_new_season_starts_from_an_empty_table():
+    df, fixtures = last_season(), new_season_fixtures()
+    played = season.season_results(df, 2025)
+    remaining = season.remaining_fixtures(fixtures, played)
+
+    assert played.empty
+    assert len(remaining) == len(fixtures)
+
+    summary = season.simulate_season(df, remaining, 2025, "poisson", 1000, chunk_size=500, workers=1, seed=0)
+    assert (summary["points"] == 0).all()
+    assert sorted(summary.index) == TEAMS
+
+
+# mid-season only this season's results are done
+def test_remaining_fixtures_skip_this_seasons_results():
+    fixtures = new_season_fixtures()
+    df = pd.concat([last_season(), fixtures.iloc[:3].assign(homeGoals=1, awayGoals=1)], ignore_index=True)
+
+    remaining = season.remaining_fixtures(fixtures, season.season_results(df, 2025))
+    pd.testing.assert_frame_equal(remaining, fixtures.iloc[3:].reset_index(drop=True))
@@ -0,0 +1,100 @@
+import threading
+import pandas as pd
+import pytest
+import service
+from utils.match_store import MATCH_COLUMNS, to_typed
+
+ROWS = [
+    ("09/08/2025 15:00", "Arsenal FC", "Chelsea FC", 2, 1),
+    ("09/08/2025 15:00", "Liverpool FC", "Everton FC", 1, 1),
+    ("16/08/2025 15:00", "Chelsea FC", "Liverpool FC", 0, 2),
+    ("16/08/2025 15:00", "Everton FC", "Arsenal FC", 1, 3),
+]
+NEW_ROWS = [
+    ("23/08/2025 15:00", "Arsenal FC", "Liverpool FC", 1, 0),
+    ("23/08/2025 15:00", "Everton FC", "Chelsea FC", 2, 2),
+]
+PROMOTED_ROWS = [("30/08/2025 15:00", "Sunderland AFC", "Arsenal FC", 0, 1)]
+
+
+@pytest.fixture
+def prediction_service(tmp_path, monkeypatch):
+    path = tmp_path / "historical_matches.csv"
+    pd.DataFrame(ROWS, columns=MATCH_COLUMNS).to_csv(path, index=False)
+
+    monkeypatch.setattr(service, "csv_path", lambda competition: str(path))
+    monkeypatch.setattr(service, "load_matches", lambda competitions=None: to_typed(pd.read_csv(path)))
+    return service.PredictionService(["poisson"]), path
+
+
+def test_concurrent_reloads_append_once(prediction_service):
+    prediction_service, path = prediction_service
+    pd.DataFrame(NEW_ROWS + PROMOTED_ROWS, columns=MATCH_COLUMNS).to_csv(path, mode="a", header=False, index=False)
+
+    threads = [threading.Thread(target=prediction_service.reload) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(prediction_service.df) == len(ROWS) + len(NEW_ROWS) + len(PROMOTED_ROWS)
+    # a team new to the history doesn't turn the team columns into strings
+    assert isinstance(prediction_service.df["homeTeam"].dtype, pd.CategoricalDtype)
+    assert prediction_service.reload() == 0
+
+
+def test_predictions_after_reload(prediction_service):
+    prediction_service, path = prediction_service
+    before = prediction_service.predict("Arsenal FC", "Chelsea FC")
+
+    pd.DataFrame(NEW_ROWS, columns=MATCH_COLUMNS).to_csv(path, mode="a", header=False, index=False)
+    assert prediction_service.reload() == 2
+    after = prediction_service.predict("Arsenal FC", "Chelsea FC")
+    assert after["probabilities"] != before["probabilities"]
+
+
+def test_readers_share_the_lock():
+    lock = service.ReadWriteLock()
+    both_inside = threading.Barrier(2, timeout=5)
+
+    def read():
+        with lock.read():
+            both_inside.wait()
+
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not both_inside.broken
+
+
+def test_writer_excludes_readers():
+    lock = service.ReadWriteLock()
+    events = []
+
+    def read():
+        with lock.read():
+            events.append("read")
+
+    with lock.write():
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(0.1)
+        events.append("write done")
+    reader.join(5)
+    assert events == ["write done", "read"]
+
+
+@pytest.mark.parametrize("body", [
+    {"mode": "loop"},
+    {"simulations": 0},
+    {"simulations": service.MAX_SIMULATIONS + 1},
+])
+def test_request_limits(body):
+    with pytest.raises(ValueError):
+        service._request_options(body)
+
+
+def test_request_defaults():
+    assert service._request_options({}) == {"model_name": "poisson", "mode": "exact", "n_simulations": 1000}
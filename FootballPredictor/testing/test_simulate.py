@@ -0,0 +1,22 @@
+import numpy as np
+from simulate import poisson_score_matrix
+
+
+def test_poisson_score_matrix_sums_to_one():
+    matrices = poisson_score_matrix([1.4, 0.3], [1.1, 2.5])
+    assert matrices.shape == (2, 11, 11)
+    np.testing.assert_allclose(matrices.sum(axis=(1, 2)), 1.0)
+
+
+# a team that scored nothing in the window gets an expected-goals rate of 0
+def test_poisson_score_matrix_zero_rate():
+    matrix = poisson_score_matrix(0.0, 1.2)
+    assert np.isfinite(matrix).all()
+    np.testing.assert_allclose(matrix[1:].sum(), 0.0)
+    np.testing.assert_allclose(matrix.sum(), 1.0)
+
+    both_zero = poisson_score_matrix(0.0, 0.0)
+    assert both_zero[0, 0] == 1.0
+
+    # usable as sampling weights
+    np.random.choice(matrix.size, p=matrix.ravel())
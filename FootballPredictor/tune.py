@@ -0,0 +1,198 @@
+import argparse
+import itertools
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.ensemble import RandomForestRegressor
+from backtest import score_predictions
+from models.features import WINDOWS
+from models.random_forest import HYPERPARAMS, feature_matrices
+from simulate import poisson_score_matrix
+from utils import instrumentation
+from utils.match_store import load_matches
+
+# candidate grid: forest size, depth, leaf size and feature windows
+N_ESTIMATORS = [50, 100, 300]
+MAX_DEPTH = [None, 12, 6]
+MIN_SAMPLES_LEAF = [1, 5]
+FEATURE_WINDOWS = [WINDOWS, (3, 10), (5, 10, 20)]
+
+# expanding-window folds: the last N_FOLDS blocks of the history are each scored once,
+# trained on everything before them
+N_FOLDS = 4
+
+# single-fixture predictions timed per fitted candidate
+LATENCY_REPEATS = 50
+
+# same clipping as random_forest.expected_goals
+MIN_GOALS, MAX_GOALS = 0.1, 3.5
+
+# fold matrices shared by every candidate in a worker process
+_FOLDS = None
+
+
+# (train_rows, test_rows) index pairs over the date-sorted history
+def time_series_folds(df, n_folds=N_FOLDS):
+    bounds = np.linspace(0, len(df), n_folds + 2).astype(int)
+    return [(bounds[i], bounds[i + 1]) for i in range(1, n_folds + 1)]
+
+
+def candidates(n_estimators=N_ESTIMATORS, max_depth=MAX_DEPTH, min_samples_leaf=MIN_SAMPLES_LEAF,
+               feature_windows=FEATURE_WINDOWS):
+    return [
+        {"n_estimators": trees, "max_depth": depth, "min_samples_leaf": leaf, "windows": tuple(windows)}
+        for trees, depth, leaf, windows in itertools.product(n_estimators, max_depth, min_samples_leaf, feature_windows)
+    ]
+
+
+# feature matrices per (fold, windows), built once and reused by every candidate.
+# features come from the train slice only, so season averages never see the test block
+def build_fold_matrices(df, folds, feature_windows):
+    matrices = {}
+    for fold, (train_rows, test_rows) in enumerate(folds):
+        train_df = df.iloc[:train_rows]
+        test_df = df.iloc[train_rows:test_rows]
+        for windows in feature_windows:
+            X, y_home, y_away, X_test = feature_matrices(
+                train_df, test_df["homeTeam"].to_numpy(), test_df["awayTeam"].to_numpy(), windows
+            )
+            matrices[fold, tuple(windows)] = {
+                "X": X.to_numpy(), "y_home": y_home.to_numpy(), "y_away": y_away.to_numpy(),
+                "X_test": X_test.to_numpy(),
+                "home_goals": test_df["homeGoals"].to_numpy(), "away_goals": test_df["awayGoals"].to_numpy(),
+            }
+    return matrices
+
+
+def _init_worker(folds):
+    global _FOLDS
+    _FOLDS = folds
+
+
+# fit one candidate on one fold; returns its scores and single-fixture latency
+def _evaluate(task):
+    candidate, fold = task
+    data = _FOLDS[fold, candidate["windows"]]
+
+    # candidates are spread across processes, so each forest stays on one core
+    params = {**HYPERPARAMS, "n_jobs": 1, **{k: v for k, v in candidate.items() if k != "windows"}}
+    start = time.perf_counter()
+    home_model = RandomForestRegressor(**params).fit(data["X"], data["y_home"])
+    away_model = RandomForestRegressor(**params).fit(data["X"], data["y_away"])
+    fit_seconds = time.perf_counter() - start
+
+    expected_home = np.clip(home_model.predict(data["X_test"]), MIN_GOALS, MAX_GOALS)
+    expected_away = np.clip(away_model.predict(data["X_test"]), MIN_GOALS, MAX_GOALS)
+
+    matrices = poisson_score_matrix(expected_home, expected_away)
+    probabilities = np.stack([
+        np.tril(matrices, -1).sum(axis=(1, 2)),
+        np.trace(matrices, axis1=1, axis2=2),
+        np.triu(matrices, 1).sum(axis=(1, 2)),
+    ], axis=1)
+
+    # what a live request pays: both forests on one feature row
+    row = data["X_test"][:1]
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        home_model.predict(row)
+        away_model.predict(row)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        **candidate,
+        "fold": fold,
+        "test_matches": len(data["X_test"]),
+        "fit_seconds": fit_seconds,
+        "latency_ms": float(np.median(timings)) * 1000,
+        **score_predictions(probabilities, data["home_goals"], data["away_goals"]),
+    }
+
+
+# every candidate on every fold, spread across a process pool. returns one row per candidate
+# with match-weighted scores, fit time and median prediction latency
+def run_search(df, grid, n_folds=N_FOLDS, workers=None):
+    df = df.sort_values("date", kind="stable").reset_index(drop=True)
+    folds = time_series_folds(df, n_folds)
+    matrices = build_fold_matrices(df, folds, sorted({c["windows"] for c in grid}))
+    tasks = [(candidate, fold) for candidate in grid for fold in range(len(folds))]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(matrices)
+        results = [_evaluate(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=instrumentation.init_worker,
+                                 initargs=(instrumentation.worker_state(), _init_worker, matrices)) as pool:
+            results = instrumentation.map_collected(pool, _evaluate, tasks)
+
+    return summarize(pd.DataFrame(results))
+
+
+def summarize(results):
+    keys = ["n_estimators", "max_depth", "min_samples_leaf", "windows"]
+    scores = ["accuracy", "brier", "log_loss"]
+
+    # groupby drops None keys, so depth is grouped on a placeholder
+    results = results.assign(max_depth=results["max_depth"].fillna(0).astype(int))
+    weighted = results[scores].mul(results["test_matches"], axis=0)
+    weighted[keys + ["test_matches"]] = results[keys + ["test_matches"]]
+
+    summary = weighted.groupby(keys).sum()
+    summary[scores] = summary[scores].div(summary["test_matches"], axis=0)
+    grouped = results.groupby(keys)
+    summary["fit_seconds"] = grouped["fit_seconds"].mean()
+    summary["latency_ms"] = grouped["latency_ms"].median()
+
+    summary = summary.reset_index().drop(columns="test_matches")
+    summary["max_depth"] = summary["max_depth"].replace(0, None)
+    summary["pareto"] = pareto_front(summary)
+    return summary.sort_values("latency_ms", ignore_index=True)
+
+
+# candidates no other candidate beats on both accuracy and latency
+def pareto_front(summary):
+    order = summary.sort_values(["latency_ms", "accuracy"], ascending=[True, False]).index
+    front = pd.Series(False, index=summary.index)
+    best = -np.inf
+    for i in order:
+        if summary.at[i, "accuracy"] > best:
+            front[i] = True
+            best = summary.at[i, "accuracy"]
+    return front
+
+
+def _windows(value):
+    return tuple(int(w) for w in value.split(","))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Random forest hyperparameter search over time-series folds")
+    parser.add_argument("--trees", nargs="+", type=int, default=N_ESTIMATORS)
+    parser.add_argument("--depths", nargs="+", type=int, default=[d or 0 for d in MAX_DEPTH], help="0 for unlimited")
+    parser.add_argument("--min-leaf", nargs="+", type=int, default=MIN_SAMPLES_LEAF)
+    parser.add_argument("--windows", nargs="+", type=_windows, default=FEATURE_WINDOWS, help="e.g. 5,15 3,10")
+    parser.add_argument("--folds", type=int, default=N_FOLDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="write the candidate table to this csv")
+    parser.add_argument("--competition", default="PL", help="football-data.org competition code")
+    args = parser.parse_args(argv)
+
+    df = load_matches(competitions=[args.competition])
+    grid = candidates(args.trees, [d or None for d in args.depths], args.min_leaf, args.windows)
+    summary = run_search(df, grid, args.folds, args.workers)
+
+    if args.output:
+        summary.to_csv(args.output, index=False)
+
+    print(f"{len(grid)} candidates x {args.folds} folds\n")
+    print(summary.round(4).to_string(index=False))
+    print("\nAccuracy vs latency pareto front:")
+    print(summary[summary["pareto"]].drop(columns="pareto").round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import aiohttp
+from utils.instrumentation import count, timed
+
+# override (e.g. with the testing/stub_api.py server) through FOOTBALL_API_URL
+API_BASE_URL = "https://api.football-data.org/v4"
+
+# football-data.org free tier quota
+REQUESTS_PER_MINUTE = 10
+
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 1.0
+TIMEOUT_SECONDS = 15
+MAX_CONNECTIONS = 8
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# conditional-request validators and payloads by url, shared by every client in the process
+_RESPONSE_CACHE = {}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"API error {status}: {message}")
+        self.status = status
+
+
+# token bucket: bursts up to capacity, refilled at the per-minute rate.
+# callers reserve a token (going into debt when empty) and sleep until it is due,
+# so waiters are served in order and the bucket works across threads and event loops
+class TokenBucket:
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, capacity=None):
+        self.rate = requests_per_minute / 60
+        self.capacity = capacity or requests_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+# one quota per process, shared by every client
+_DEFAULT_BUCKET = TokenBucket()
+
+
+# async football-data.org client: pooled session, rate limiting, retries with
+# exponential backoff and ETag / Last-Modified revalidation
+class FootballDataClient:
+    def __init__(self, api_key, base_url=None, bucket=None,
+                 max_retries=MAX_RETRIES, backoff_seconds=BACKOFF_SECONDS):
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("FOOTBALL_API_URL", API_BASE_URL)).rstrip("/")
+        self.bucket = bucket or _DEFAULT_BUCKET
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            headers={"X-Auth-Token": self.api_key or ""},
+            connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS),
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT_SECONDS),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def get(self, path, params=None):
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        params = {k: str(v) for k, v in (params or {}).items()}
+        cache_key = (url, tuple(sorted(params.items())))
+        cached = _RESPONSE_CACHE.get(cache_key)
+
+        headers = {}
+        if cached is not None:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            count("api_requests")
+
+            try:
+                async with self.session.get(url, params=params, headers=headers) as response:
+                    if response.status == 304 and cached is not None:
+                        count("api_not_modified")
+                        return cached["payload"]
+
+                    if response.status == 200:
+                        payload = await response.json()
+                        _RESPONSE_CACHE[cache_key] = {
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                            "payload": payload,
+                        }
+                        return payload
+
+                    if response.status not in RETRY_STATUSES or attempt == self.max_retries:
+                        raise ApiError(response.status, await response.text())
+
+                    delay = _retry_delay(response, attempt, self.backoff_seconds)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.max_retries:
+                    raise
+                delay = _retry_delay(None, attempt, self.backoff_seconds)
+
+            await asyncio.sleep(delay)
+
+    async def team_matches(self, team_id, **params):
+        payload = await self.get(f"teams/{team_id}/matches", params)
+        return payload.get("matches", [])
+
+    async def competition_matches(self, competition="PL", **params):
+        payload = await self.get(f"competitions/{competition}/matches", params)
+        return payload.get("matches", [])
+
+
+# server-requested wait (Retry-After / football-data's X-RequestCounter-Reset), else jittered backoff
+def _retry_delay(response, attempt, backoff_seconds):
+    if response is not None:
+        for header in ("Retry-After", "X-RequestCounter-Reset"):
+            value = response.headers.get(header)
+            if value is not None and value.isdigit():
+                return float(value)
+    return backoff_seconds * (2 ** attempt) * (0.5 + random.random())
+
+
+async def _with_client(api_key, fn):
+    async with FootballDataClient(api_key) as client:
+        return await fn(client)
+
+
+# synchronous entry points for scripts
+@timed("api_fetch")
+def fetch_competition_matches(api_key, competition="PL", **params):
+    return asyncio.run(_with_client(api_key, lambda client: client.competition_matches(competition, **params)))
@@ -0,0 +1,105 @@
+import argparse
+import glob
+import os
+import pandas as pd
+from utils.match_store import DEFAULT_COMPETITION, append_matches, load_key_index, match_keys
+from utils.name_mapping import normalize_team_names
+
+# raw season files (fixturedownload.com format) live in the repository-level data folder
+RAW_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+RAW_PATTERN = "epl-*-GMTStandardTime.csv"
+
+# kickoffs in the raw files are uk local times
+RAW_DATE_FORMAT = "%d/%m/%Y %H:%M"
+RAW_TIMEZONE = "Europe/London"
+
+# rows read per chunk, and rows buffered before each store write
+CHUNK_SIZE = 5000
+
+RAW_COLUMNS = {
+    "Round Number": "round",
+    "Date": "date",
+    "Location": "venue",
+    "Home Team": "homeTeam",
+    "Away Team": "awayTeam",
+    "Result": "result",
+}
+
+
+def season_files(raw_dir=RAW_DIR):
+    return sorted(glob.glob(os.path.join(raw_dir, RAW_PATTERN)))
+
+
+# raw kickoffs (strings or parsed local times) as utc timestamps, like the api's utcDate.
+# clocks going back repeat an hour, which is read as the later (gmt) one
+def raw_kickoffs_utc(dates):
+    local = pd.to_datetime(dates, format=RAW_DATE_FORMAT)
+    return local.dt.tz_localize(RAW_TIMEZONE, ambiguous=False, nonexistent="shift_forward").dt.tz_convert("UTC")
+
+
+# stream a raw season file as chunks in match store format.
+# unplayed fixtures are kept with missing goals (to_typed drops them when storing).
+# results are read as strings, otherwise a chunk with no results comes back as float
+def read_season_file(path, chunk_size=CHUNK_SIZE):
+    for chunk in pd.read_csv(path, usecols=list(RAW_COLUMNS), dtype={"Result": "string"}, chunksize=chunk_size):
+        chunk = chunk.rename(columns=RAW_COLUMNS)
+
+        chunk["homeTeam"] = normalize_team_names(chunk["homeTeam"])
+        chunk["awayTeam"] = normalize_team_names(chunk["awayTeam"])
+
+        # "3 - 1" -> 3, 1
+        goals = chunk["result"].str.extract(r"(\d+)\s*-\s*(\d+)")
+        chunk["homeGoals"] = pd.to_numeric(goals[0]).astype(float)
+        chunk["awayGoals"] = pd.to_numeric(goals[1]).astype(float)
+
+        yield chunk.drop(columns="result")
+
+
+# import every finished match from the raw season files that isn't already stored.
+# returns the number of matches added
+def import_season_files(paths=None, chunk_size=CHUNK_SIZE, competition=DEFAULT_COMPETITION):
+    paths = season_files() if paths is None else paths
+    known_keys = load_key_index()
+
+    buffered = []
+    buffered_rows = 0
+    added = 0
+
+    for path in paths:
+        for chunk in read_season_file(path, chunk_size):
+            chunk = chunk.dropna(subset=["homeGoals", "awayGoals"])
+
+            # O(1) dedupe against the store and earlier rows of this import
+            keep = []
+            for key in match_keys(chunk):
+                keep.append(key not in known_keys)
+                known_keys.add(key)
+
+            chunk = chunk[keep]
+            if chunk.empty:
+                continue
+
+            buffered.append(chunk)
+            buffered_rows += len(chunk)
+
+            if buffered_rows >= chunk_size:
+                added += len(append_matches(pd.concat(buffered, ignore_index=True), competition))
+                buffered, buffered_rows = [], 0
+
+        print(f"Read {os.path.basename(path)}")
+
+    if buffered:
+        added += len(append_matches(pd.concat(buffered, ignore_index=True), competition))
+
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import raw season files into the match store")
+    parser.add_argument("paths", nargs="*", help=f"season files (default: {RAW_PATTERN} in {RAW_DIR})")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--competition", default=DEFAULT_COMPETITION, help="competition code of the files")
+    args = parser.parse_args()
+
+    added = import_season_files(args.paths or None, args.chunk_size, args.competition)
+    print(f"Added {added} new matches to the match store")
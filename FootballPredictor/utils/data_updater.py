@@ -1,23 +1,31 @@
 import os
 import pandas as pd
-import requests
 from datetime import datetime, timezone
-from dotenv import load_dotenv
-from utils.name_mapping import normalize_team_name
+from utils.api_client import fetch_competition_matches
+from utils.instrumentation import timed
+from utils.match_store import MATCH_COLUMNS, append_matches, load_key_index, match_key
+from utils.name_mapping import normalize_team_name, register_team_ids
 
-load_dotenv()
-
-HISTORICAL_CSV = "data/historical_matches.csv"
 LAST_UPDATE_FILE = "data/last_update.txt"
 
-API_URL = "https://api.football-data.org/v4/competitions/PL/matches"
+# football-data.org competition code updated by default
+COMPETITION = "PL"
+
+
+# each competition is updated on its own schedule
+def last_update_file(competition=COMPETITION):
+    if competition == COMPETITION:
+        return LAST_UPDATE_FILE
+    return f"data/last_update_{competition}.txt"
+
 
 # read in last update from .txt file
-def read_last_update():
-    if not os.path.exists(LAST_UPDATE_FILE):
+def read_last_update(competition=COMPETITION):
+    path = last_update_file(competition)
+    if not os.path.exists(path):
         return datetime(2000, 1, 1, tzinfo=timezone.utc)
 
-    with open(LAST_UPDATE_FILE, "r") as f:
+    with open(path, "r") as f:
         ts = f.read().strip()
 
     try:
@@ -27,20 +35,14 @@ def read_last_update():
 
 
 # write new last_update to .txt file (last_update.txt)
-def save_last_update():
-    with open(LAST_UPDATE_FILE, "w") as f:
+def save_last_update(competition=COMPETITION):
+    with open(last_update_file(competition), "w") as f:
         f.write(datetime.now(timezone.utc).isoformat())
 
 
 # return latest past fixtures
-def get_api_matches(api_key):
-    headers = {"X-Auth-Token": api_key}
-    response = requests.get(API_URL, headers=headers)
-
-    if response.status_code != 200:
-        raise Exception(f"API error {response.status_code}: {response.text}")
-
-    return response.json().get("matches", [])
+def get_api_matches(api_key, competition=COMPETITION):
+    return fetch_competition_matches(api_key, competition)
 
 
 # ensure correct naming
@@ -56,20 +58,29 @@ def convert_to_csv_format(match):
     return (date_str, home, away, hg, ag)
 
 
+# teams with new results, so downstream caches can refresh only those
+def affected_teams(df_new):
+    return sorted(set(df_new["homeTeam"]) | set(df_new["awayTeam"]))
+
+
 # main logic: get fixtures from last update until current and update dataset
-def append_new_matches(api_key):
-    print("Checking for new Premier League results...")
+# returns the appended rows so in-memory datasets (and their caches) can be extended
+@timed()
+def append_new_matches(api_key, competition=COMPETITION):
+    print(f"Checking for new {competition} results...")
 
-    last_update = read_last_update()
+    last_update = read_last_update(competition)
     print(f"Last update: {last_update}")
 
-    matches = get_api_matches(api_key)
+    matches = get_api_matches(api_key, competition)
 
-    if os.path.exists(HISTORICAL_CSV):
-        df_hist = pd.read_csv(HISTORICAL_CSV)
-    else:
-        df_hist = pd.DataFrame(columns=["date", "homeTeam", "awayTeam", "homeGoals", "awayGoals"])
+    # teams of other competitions get their ids from the payload
+    register_team_ids(
+        (match[side]["name"], match[side].get("id"))
+        for match in matches for side in ("homeTeam", "awayTeam")
+    )
 
+    known_keys = load_key_index()
     new_rows = []
 
     for match in matches:
@@ -82,27 +93,30 @@ def append_new_matches(api_key):
             continue
 
         row = convert_to_csv_format(match)
+        key = match_key(row[0], row[1], row[2])
 
-        if not df_hist[
-            (df_hist['homeTeam'] == row[1]) &
-            (df_hist['awayTeam'] == row[2]) &
-            (df_hist['date'] == row[0])
-        ].empty:
+        if key in known_keys:
             continue
 
+        known_keys.add(key)
         new_rows.append(row)
 
-    if not new_rows:
+    df_new = pd.DataFrame(new_rows, columns=MATCH_COLUMNS)
+
+    if df_new.empty:
         print("No new matches to add.\n")
-        return
+        return df_new
 
-    df_new = pd.DataFrame(new_rows, columns=["date", "homeTeam", "awayTeam", "homeGoals", "awayGoals"])
-    df_new.to_csv(HISTORICAL_CSV, mode="a", header=False, index=False)
-    print(f"Added {len(df_new)} new matches to {HISTORICAL_CSV}")
+    df_new = append_matches(df_new, competition)
 
-    save_last_update()
+    print(f"Added {len(df_new)} new matches to the match store")
+    print(f"Affected teams: {', '.join(affected_teams(df_new))}")
+
+    save_last_update(competition)
     print("Updated last update timestamp.")
 
+    return df_new
+
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
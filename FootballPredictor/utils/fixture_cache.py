@@ -0,0 +1,117 @@
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from utils.name_mapping import normalize_team_name
+
+CACHE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fixtures_cache.sqlite")
+
+# a miss after a refill this recent means the team has no scheduled fixture, not a stale cache
+REFILL_INTERVAL_SECONDS = 6 * 3600
+
+
+def _kickoff_timestamp(utc_date):
+    return datetime.fromisoformat(utc_date.replace("Z", "+00:00")).timestamp()
+
+
+# each competition is refilled on its own schedule
+def _refill_key(competition):
+    return "last_refill" if competition == "PL" else f"last_refill_{competition}"
+
+
+# competition-wide fixture cache: sqlite on disk (safe across processes), an in-memory
+# per-team index sorted by kickoff, and entries that expire once their kickoff has passed
+class FixtureCache:
+    def __init__(self, path=CACHE_DB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS fixtures ("
+                "match_id INTEGER PRIMARY KEY, competition TEXT, kickoff REAL, utc_date TEXT, "
+                "home_id INTEGER, away_id INTEGER, home TEXT, away TEXT)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS fixtures_kickoff ON fixtures (kickoff)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)")
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        self._index = {}
+        rows = self.conn.execute(
+            "SELECT kickoff, utc_date, home_id, away_id, home, away FROM fixtures ORDER BY kickoff"
+        )
+        for kickoff, utc_date, home_id, away_id, home, away in rows:
+            fixture = {"home": home, "away": away, "date": utc_date}
+            for team_id in (home_id, away_id):
+                self._index.setdefault(team_id, ([], []))
+                self._index[team_id][0].append(kickoff)
+                self._index[team_id][1].append(fixture)
+
+    # store api matches (e.g. every scheduled match of a competition) in one transaction
+    def store_matches(self, matches, competition="PL"):
+        rows = [
+            (
+                match["id"], competition, _kickoff_timestamp(match["utcDate"]), match["utcDate"],
+                match["homeTeam"]["id"], match["awayTeam"]["id"],
+                normalize_team_name(match["homeTeam"]["name"]),
+                normalize_team_name(match["awayTeam"]["name"]),
+            )
+            for match in matches
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO fixtures VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (_refill_key(competition), time.time()))
+            self._load_index()
+
+    # next fixture for team_id that hasn't kicked off, or None
+    def lookup(self, team_id, now=None):
+        now = time.time() if now is None else now
+        kickoffs, fixtures = self._index.get(int(team_id), ([], []))
+        i = bisect.bisect_right(kickoffs, now)
+        return fixtures[i] if i < len(fixtures) else None
+
+    # cached next fixture, refilling from fetch() (returning the competition's api matches) on a miss
+    def next_fixture(self, team_id, fetch=None, now=None, competition="PL"):
+        fixture = self.lookup(team_id, now)
+        if fixture is not None:
+            self.hits += 1
+            return fixture
+
+        self.misses += 1
+        if fetch is None or self._recently_refilled(competition):
+            return None
+
+        self.store_matches(fetch(), competition)
+        return self.lookup(team_id, now)
+
+    def _recently_refilled(self, competition="PL"):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (_refill_key(competition),)).fetchone()
+        return row is not None and time.time() - row[0] < REFILL_INTERVAL_SECONDS and bool(self._index)
+
+    # drop fixtures that have kicked off (one indexed delete, no per-entry parsing)
+    def purge_expired(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock, self.conn:
+            removed = self.conn.execute("DELETE FROM fixtures WHERE kickoff < ?", (now,)).rowcount
+            if removed:
+                self._load_index()
+        return removed
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "fixtures": self.conn.execute("SELECT COUNT(*) FROM fixtures").fetchone()[0],
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,46 @@
+import weakref
+import numpy as np
+import pandas as pd
+
+
+# single-entry cache of a value derived from a match dataframe.
+# history is append-only, so a frame whose first rows match the cached frame's rows
+# (by content hash) is refreshed with extend(value, new_rows) instead of a full build(df).
+# the cached frame object itself is trusted while its length is unchanged: frames passed
+# in are treated as immutable, and edits must be made on a copy (which is then re-hashed)
+class FrameCache:
+    def __init__(self, build, extend=None):
+        self.build = build
+        self.extend = extend
+        self.value = None
+        self._frame = None
+        self._hashes = None
+
+    def get(self, df):
+        if self._frame is not None and self._frame() is df and len(self._hashes) == len(df):
+            return self.value
+
+        hashes = _row_hashes(df)
+        rows = 0 if self._hashes is None else len(self._hashes)
+        if self.value is not None and 0 < rows <= len(df) and np.array_equal(hashes[:rows], self._hashes):
+            if rows < len(df):
+                if self.extend is None:
+                    self.value = self.build(df)
+                else:
+                    self.value = self.extend(self.value, df.iloc[rows:])
+        else:
+            self.value = self.build(df)
+
+        self._frame = weakref.ref(df)
+        self._hashes = hashes
+        return self.value
+
+    def clear(self):
+        self.value = None
+        self._frame = None
+        self._hashes = None
+
+
+# per-row content hashes (category values, not codes, so re-typed frames still match)
+def _row_hashes(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
@@ -0,0 +1,265 @@
+import atexit
+import functools
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# run reports (and cProfile dumps), one json file per instrumented run
+REPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "reports")
+
+# comma-separated options, e.g. FOOTBALL_INSTRUMENT=timers or FOOTBALL_INSTRUMENT=cprofile,tracemalloc
+ENV_VAR = "FOOTBALL_INSTRUMENT"
+
+# timers are always on once instrumentation is; the others add real overhead
+OPTIONS = ("timers", "cprofile", "tracemalloc")
+
+# functions / allocation sites kept in the report
+TOP_N = 25
+
+# state of the current run (None when instrumentation is off, so stages cost one check)
+_RUN = None
+
+
+# "timers,cprofile" (or an already parsed collection) -> set of options
+def parse_options(value):
+    if isinstance(value, str) or value is None:
+        value = (value or "").split(",")
+    options = {option.strip() for option in value if option.strip()}
+    if "all" in options or "1" in options:
+        options = set(OPTIONS)
+    unknown = options - set(OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown instrumentation options: {', '.join(sorted(unknown))}")
+    return options
+
+
+def enabled():
+    return _RUN is not None
+
+
+# start collecting for this process. options default to the environment variable;
+# nothing is collected when neither asks for it
+def start(command=None, options=None, report_dir=REPORT_DIR):
+    global _RUN
+    options = parse_options(os.getenv(ENV_VAR) if options is None else options)
+    if not options or _RUN is not None:
+        return
+
+    _RUN = {
+        "command": command if command is not None else sys.argv,
+        "options": sorted(options | {"timers"}),
+        "report_dir": report_dir,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "start": time.perf_counter(),
+        "stages": {},
+        "counters": {},
+        "stack": [],
+        "profiler": None,
+    }
+
+    if "tracemalloc" in options:
+        import tracemalloc
+
+        tracemalloc.start()
+    if "cprofile" in options:
+        import cProfile
+
+        _RUN["profiler"] = cProfile.Profile()
+        _RUN["profiler"].enable()
+
+    # runs that exit early (errors, sys.exit) still leave a report
+    atexit.register(finish)
+
+
+# time a block. nested stages are reported by path, e.g. "predict/simulate/train"
+@contextmanager
+def stage(name):
+    if _RUN is None:
+        yield
+        return
+
+    _RUN["stack"].append(name)
+    path = "/".join(_RUN["stack"])
+    memory = _traced_memory()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _RUN["stack"].pop()
+
+        totals = _RUN["stages"].setdefault(path, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+        totals["calls"] += 1
+        totals["seconds"] += seconds
+        totals["max_seconds"] = max(totals["max_seconds"], seconds)
+        if memory is not None:
+            totals["allocated_bytes"] = totals.get("allocated_bytes", 0) + _traced_memory() - memory
+
+
+# decorator form of stage, named after the function unless given a name
+def timed(name=None):
+    def decorator(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _RUN is None:
+                return fn(*args, **kwargs)
+            with stage(stage_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, n=1):
+    if _RUN is not None:
+        _RUN["counters"][name] = _RUN["counters"].get(name, 0) + n
+
+
+# what a pool worker needs to collect for this run (None when instrumentation is off)
+def worker_state():
+    if _RUN is None:
+        return None
+    return {"stack": list(_RUN["stack"])}
+
+
+# process pool initializer: drops the run a forked worker inherits (its profiler, report
+# and atexit hook belong to the parent) and, when the parent is instrumented, starts a
+# timers-only run under the parent's current stage. then runs the pool's own initializer
+def init_worker(state, initializer=None, *initargs):
+    global _RUN
+    _RUN = None
+    if state is not None:
+        _RUN = {"options": ["timers"], "stages": {}, "counters": {}, "stack": list(state["stack"]), "profiler": None}
+    if initializer is not None:
+        initializer(*initargs)
+
+
+# stage and counter totals since the last call, reset for the next task
+def collect():
+    if _RUN is None:
+        return None
+    totals = {"stages": _RUN["stages"], "counters": _RUN["counters"]}
+    _RUN["stages"], _RUN["counters"] = {}, {}
+    return totals
+
+
+# add a worker's totals to this run. stage seconds are summed across workers,
+# so a parallel stage can report more seconds than the run's wall time
+def merge(totals):
+    if _RUN is None or not totals:
+        return
+    for path, worker in totals["stages"].items():
+        stage_totals = _RUN["stages"].setdefault(path, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+        stage_totals["calls"] += worker["calls"]
+        stage_totals["seconds"] += worker["seconds"]
+        stage_totals["max_seconds"] = max(stage_totals["max_seconds"], worker["max_seconds"])
+    for name, n in totals["counters"].items():
+        count(name, n)
+
+
+def _collected(fn, task):
+    return fn(task), collect()
+
+
+# pool.map whose workers send their totals back with each result (pools started
+# with init_worker). returns the results in task order
+def map_collected(pool, fn, tasks, chunksize=1):
+    results = []
+    for result, totals in pool.map(functools.partial(_collected, fn), tasks, chunksize=chunksize):
+        merge(totals)
+        results.append(result)
+    return results
+
+
+def _traced_memory():
+    if "tracemalloc" not in _RUN["options"]:
+        return None
+    import tracemalloc
+
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# stop collecting and write the report; returns its path (None when instrumentation is off)
+def finish():
+    global _RUN
+    run, _RUN = _RUN, None
+    if run is None:
+        return None
+
+    report = {
+        "command": run["command"],
+        "options": run["options"],
+        "started_at": run["started_at"],
+        "wall_seconds": time.perf_counter() - run["start"],
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "pid": os.getpid(),
+        "stages": run["stages"],
+        "counters": run["counters"],
+    }
+
+    os.makedirs(run["report_dir"], exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(run["report_dir"], f"run-{stamp}-{os.getpid()}.json")
+
+    if "tracemalloc" in run["options"]:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        sites = tracemalloc.take_snapshot().statistics("lineno")[:TOP_N]
+        tracemalloc.stop()
+        report["memory"] = {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top_allocations": [{"site": str(site.traceback), "bytes": site.size, "blocks": site.count} for site in sites],
+        }
+
+    if run["profiler"] is not None:
+        import pstats
+
+        run["profiler"].disable()
+        profile_path = path[:-len(".json")] + ".prof"
+        run["profiler"].dump_stats(profile_path)
+
+        stats = pstats.Stats(run["profiler"]).stats
+        top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_N]
+        report["profile"] = {
+            "path": profile_path,
+            "top_cumulative": [
+                {"function": f"{file}:{line}({fn})", "calls": calls, "total_seconds": total, "cumulative_seconds": cumulative}
+                for (file, line, fn), (_, calls, total, cumulative, _) in top
+            ],
+        }
+
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+# instrument the enclosed block as one run
+@contextmanager
+def run(command=None, options=None, report_dir=REPORT_DIR):
+    start(command, options, report_dir)
+    try:
+        yield
+    finally:
+        path = finish()
+        if path:
+            print(f"Instrumentation report: {path}", file=sys.stderr)
@@ -0,0 +1,281 @@
+import glob
+import hashlib
+import importlib.util
+import os
+import shutil
+import uuid
+import pandas as pd
+from pandas.api.types import union_categoricals
+from utils.instrumentation import count, timed
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# canonical store: parquet files partitioned by competition and season
+# (data/matches/competition=PL/season=2024/part-*.parquet). a csv per competition
+# is kept in sync as the import/export format
+STORE_DIR = os.path.join(DATA_DIR, "matches")
+HISTORICAL_CSV = os.path.join(DATA_DIR, "historical_matches.csv")
+
+# football-data.org competition code of rows that don't say otherwise (and of historical_matches.csv)
+DEFAULT_COMPETITION = "PL"
+
+# hashed (date, home, away) keys of every stored match, one per line
+KEY_INDEX_FILE = os.path.join(DATA_DIR, "historical_matches.keys")
+
+CSV_DATE_FORMAT = "%d/%m/%Y %H:%M"
+MATCH_COLUMNS = ["date", "homeTeam", "awayTeam", "homeGoals", "awayGoals"]
+
+# optional per-match details (from the raw season files), empty for api results
+EXTRA_COLUMNS = ["round", "venue"]
+
+# competition code; partitions the store
+STORE_COLUMNS = MATCH_COLUMNS + EXTRA_COLUMNS + ["competition"]
+
+# kept categorical in memory, so filters and groupbys compare integer codes
+TEAM_COLUMNS = ["homeTeam", "awayTeam"]
+
+# parquet needs pyarrow; without it the csv is used as the store
+HAS_PARQUET = importlib.util.find_spec("pyarrow") is not None
+
+
+# season a match belongs to, by its starting year (seasons run august to may)
+def season_of(dates):
+    return (dates.dt.year - (dates.dt.month < 7)).astype("int16")
+
+
+# csv mirror of a competition
+def csv_path(competition=DEFAULT_COMPETITION):
+    if competition == DEFAULT_COMPETITION:
+        return HISTORICAL_CSV
+    return os.path.join(DATA_DIR, f"historical_matches_{competition}.csv")
+
+
+# competition codes with a csv mirror
+def csv_competitions():
+    competitions = [DEFAULT_COMPETITION] if os.path.exists(HISTORICAL_CSV) else []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "historical_matches_*.csv"))):
+        competitions.append(os.path.basename(path)[len("historical_matches_"):-len(".csv")])
+    return competitions
+
+
+# typed columns: datetime kickoffs, categorical team names and competition, integer goals.
+# rows without a full-time score are not results and are dropped
+def to_typed(df, competition=DEFAULT_COMPETITION):
+    df = df.copy()
+    for column in ["homeGoals", "awayGoals"]:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    df = df.dropna(subset=["homeGoals", "awayGoals"])
+    df = df.astype({"homeGoals": "int16", "awayGoals": "int16"})
+
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(df["date"], format=CSV_DATE_FORMAT)
+
+    teams = pd.Index(pd.concat([df["homeTeam"], df["awayTeam"]]).astype(str).unique()).sort_values()
+    df["homeTeam"] = pd.Categorical(df["homeTeam"].astype(str), categories=teams)
+    df["awayTeam"] = pd.Categorical(df["awayTeam"].astype(str), categories=teams)
+
+    if "round" not in df:
+        df["round"] = pd.NA
+    if "venue" not in df:
+        df["venue"] = pd.NA
+    df = df.astype({"round": "Int16", "venue": "string"})
+
+    if "competition" not in df:
+        df["competition"] = competition
+    df["competition"] = df["competition"].astype(str).astype("category")
+
+    return df[STORE_COLUMNS]
+
+
+# pd.concat of typed frames. pd.concat turns categoricals with different categories
+# (a promoted team, another competition) into strings, so categories are unioned first
+def concat_matches(frames):
+    teams = union_categoricals([frame[column] for frame in frames for column in TEAM_COLUMNS], sort_categories=True)
+    competitions = union_categoricals([frame["competition"] for frame in frames], sort_categories=True)
+    frames = [
+        frame.assign(
+            homeTeam=frame["homeTeam"].cat.set_categories(teams.categories),
+            awayTeam=frame["awayTeam"].cat.set_categories(teams.categories),
+            competition=frame["competition"].cat.set_categories(competitions.categories),
+        )
+        for frame in frames
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+# all stored matches (optionally only some seasons / competitions), sorted by kickoff.
+# partition filters mean unselected competitions and seasons are never read
+@timed()
+def load_matches(seasons=None, competitions=None):
+    if not HAS_PARQUET:
+        frames = [
+            to_typed(pd.read_csv(csv_path(competition)), competition)
+            for competition in (competitions or csv_competitions())
+            if os.path.exists(csv_path(competition))
+        ]
+        df = to_typed(pd.concat(frames, ignore_index=True)) if frames else to_typed(pd.DataFrame(columns=MATCH_COLUMNS))
+        if seasons is not None:
+            df = df[season_of(df["date"]).isin(seasons)]
+        return df.sort_values("date", kind="stable").reset_index(drop=True)
+
+    _ensure_store()
+
+    filters = []
+    if seasons is not None:
+        filters.append(("season", "in", list(seasons)))
+    if competitions is not None:
+        filters.append(("competition", "in", list(competitions)))
+    df = pd.read_parquet(STORE_DIR, filters=filters or None, schema=_store_schema())
+
+    df = to_typed(df.drop(columns="season"))
+    return df.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+# write new matches as one part file per competition and season, mirror them to the
+# competition's csv, then index their keys. returns the rows in typed form
+@timed()
+def append_matches(df_new, competition=DEFAULT_COMPETITION):
+    df_new = to_typed(df_new, competition)
+    if df_new.empty:
+        return df_new
+    count("matches_appended", len(df_new))
+
+    if HAS_PARQUET:
+        _ensure_store()
+        _write_parts(df_new)
+
+    for code, rows in df_new.groupby("competition", observed=True):
+        _append_csv(rows, code)
+
+    with open(KEY_INDEX_FILE, "a") as f:
+        f.writelines(f"{key}\n" for key in match_keys(df_new))
+
+    return df_new
+
+
+# compact hash identifying a match by kickoff (csv format) and teams
+def match_key(date_str, home, away):
+    return hashlib.blake2b(f"{date_str}|{home}|{away}".encode(), digest_size=8).hexdigest()
+
+
+def match_keys(df):
+    dates = df["date"]
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        dates = dates.dt.strftime(CSV_DATE_FORMAT)
+    return [match_key(*row) for row in zip(dates, df["homeTeam"].astype(str), df["awayTeam"].astype(str))]
+
+
+# rebuild the key index from the csv mirrors (only needed when it is missing or stale)
+def rebuild_key_index():
+    keys = set()
+    for competition in csv_competitions():
+        keys.update(match_keys(pd.read_csv(csv_path(competition), usecols=["date", "homeTeam", "awayTeam"])))
+
+    with open(KEY_INDEX_FILE, "w") as f:
+        f.writelines(f"{key}\n" for key in keys)
+
+    return keys
+
+
+# keys of all stored matches, for O(1) dedupe. the index is written after the csv,
+# so an index older than the csv means an interrupted or external write
+def load_key_index():
+    if not os.path.exists(KEY_INDEX_FILE):
+        return rebuild_key_index()
+    index_time = os.path.getmtime(KEY_INDEX_FILE)
+    if any(os.path.getmtime(csv_path(competition)) > index_time for competition in csv_competitions()):
+        return rebuild_key_index()
+
+    with open(KEY_INDEX_FILE, "r") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+# (re)build a competition's partitions from a csv in the legacy format
+def import_csv(path=HISTORICAL_CSV, competition=DEFAULT_COMPETITION):
+    df = to_typed(pd.read_csv(path), competition)
+
+    shutil.rmtree(os.path.join(STORE_DIR, f"competition={competition}"), ignore_errors=True)
+
+    _write_parts(df)
+    rebuild_key_index()
+    return df
+
+
+# build the whole store from every csv mirror
+def import_all_csv():
+    for competition in csv_competitions():
+        import_csv(csv_path(competition), competition)
+
+
+# write a competition back out in the legacy csv format
+def export_csv(path=None, competition=DEFAULT_COMPETITION):
+    df = load_matches(competitions=[competition])
+    _to_csv_format(df).to_csv(path or csv_path(competition), index=False)
+
+
+# fixed schema, so part files written before the extra columns existed still load
+def _store_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("date", pa.timestamp("us")),
+        ("homeTeam", pa.string()),
+        ("awayTeam", pa.string()),
+        ("homeGoals", pa.int16()),
+        ("awayGoals", pa.int16()),
+        ("round", pa.int16()),
+        ("venue", pa.string()),
+        ("competition", pa.string()),
+        ("season", pa.int16()),
+    ])
+
+
+def _store_exists():
+    return bool(glob.glob(os.path.join(STORE_DIR, "competition=*", "season=*", "*.parquet")))
+
+
+# create the store on first use. a store in the old season-only layout
+# (data/matches/season=2024) holds premier league rows and is moved over as is
+def _ensure_store():
+    if _store_exists():
+        return
+
+    legacy_dirs = glob.glob(os.path.join(STORE_DIR, "season=*"))
+    if not legacy_dirs:
+        import_all_csv()
+        return
+
+    for legacy_dir in legacy_dirs:
+        _write_parts(to_typed(pd.read_parquet(legacy_dir)))
+        shutil.rmtree(legacy_dir)
+    rebuild_key_index()
+
+
+def _write_parts(df):
+    seasons = season_of(df["date"])
+    part_name = f"part-{uuid.uuid4().hex}.parquet"
+
+    for (competition, season), rows in df.groupby([df["competition"].astype(str), seasons]):
+        season_dir = os.path.join(STORE_DIR, f"competition={competition}", f"season={season}")
+        os.makedirs(season_dir, exist_ok=True)
+
+        # plain strings on disk (parquet dictionary-encodes them anyway), categoricals in memory.
+        # competition and season live in the directory names
+        rows = rows.astype({"homeTeam": str, "awayTeam": str}).drop(columns="competition")
+
+        # write then rename, so readers never see a partial part file
+        tmp_path = os.path.join(season_dir, f".{part_name}.tmp")
+        rows.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(season_dir, part_name))
+
+
+def _append_csv(df, competition=DEFAULT_COMPETITION):
+    path = csv_path(competition)
+    exists = os.path.exists(path)
+    _to_csv_format(df).to_csv(path, mode="a", header=not exists, index=False)
+
+
+def _to_csv_format(df):
+    df = df[MATCH_COLUMNS].copy()
+    df["date"] = df["date"].dt.strftime(CSV_DATE_FORMAT)
+    return df
@@ -1,3 +1,29 @@
+import json
+import os
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config")
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# football-data.org ids of the current premier league teams, by display name
+TEAMS_FILE = os.path.join(CONFIG_DIR, "teams.json")
+
+# ids learned from api payloads (other competitions, newly promoted teams)
+LEARNED_TEAM_IDS_FILE = os.path.join(DATA_DIR, "team_ids.json")
+
+# recent premier league teams missing from teams.json, including the short names
+# they are stored under in historical_matches.csv
+EXTRA_TEAM_IDS = {
+    "Luton Town FC": 389,
+    "Luton": 389,
+    "Sheffield United FC": 356,
+    "Sheffield Utd": 356,
+    "Ipswich Town FC": 349,
+    "Ipswich": 349,
+    "Leicester City FC": 338,
+    "Leicester": 338,
+    "Southampton FC": 340,
+}
+
 TEAM_NAME_MAP = {
     "Arsenal": "Arsenal FC",
     "Arsenal FC": "Arsenal FC",
@@ -12,6 +38,7 @@ TEAM_NAME_MAP = {
     "Brentford FC": "Brentford FC",
 
     "Brighton": "Brighton & Hove Albion FC",
+    "Brighton and Hove Albion": "Brighton & Hove Albion FC",
     "Brighton & Hove Albion FC": "Brighton & Hove Albion FC",
 
     "Chelsea": "Chelsea FC",
@@ -63,6 +90,7 @@ TEAM_NAME_MAP = {
 
     "Wolves": "Wolverhampton Wanderers FC",
     "Wolverhampton": "Wolverhampton Wanderers FC",
+    "Wolverhampton Wanderers": "Wolverhampton Wanderers FC",
     "Wolverhampton Wanderers FC": "Wolverhampton Wanderers FC",
 
     "Burnley": "Burnley FC",
@@ -76,3 +104,56 @@ TEAM_NAME_MAP = {
 # enforce correct naming of teams
 def normalize_team_name(name: str) -> str:
     return TEAM_NAME_MAP.get(name, name)
+
+
+# vectorized normalize_team_name for a whole column
+def normalize_team_names(names):
+    return names.map(TEAM_NAME_MAP).fillna(names)
+
+
+# alias table: every known name (normalized) -> integer team id, loaded on first use
+_TEAM_IDS = None
+
+
+def team_id_table():
+    global _TEAM_IDS
+    if _TEAM_IDS is None:
+        table = {}
+        with open(TEAMS_FILE, "r") as f:
+            for team_id, name in json.load(f).items():
+                table[normalize_team_name(name)] = int(team_id)
+        table.update(EXTRA_TEAM_IDS)
+
+        if os.path.exists(LEARNED_TEAM_IDS_FILE):
+            with open(LEARNED_TEAM_IDS_FILE, "r") as f:
+                table.update({name: int(team_id) for name, team_id in json.load(f).items()})
+
+        _TEAM_IDS = table
+    return _TEAM_IDS
+
+
+# integer id for a team name, or None if it isn't in the alias table
+def team_id(name):
+    return team_id_table().get(normalize_team_name(name))
+
+
+# record (name, id) pairs seen in api payloads so other competitions resolve too
+def register_team_ids(pairs):
+    table = team_id_table()
+    new = {normalize_team_name(name): int(team_id) for name, team_id in pairs
+           if team_id is not None and normalize_team_name(name) not in table}
+    if not new:
+        return
+
+    table.update(new)
+
+    learned = {}
+    if os.path.exists(LEARNED_TEAM_IDS_FILE):
+        with open(LEARNED_TEAM_IDS_FILE, "r") as f:
+            learned = json.load(f)
+    learned.update(new)
+
+    tmp_path = f"{LEARNED_TEAM_IDS_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(learned, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, LEARNED_TEAM_IDS_FILE)
@@ -0,0 +1,185 @@
+import io
+import json
+import math
+import os
+import pandas as pd
+from utils.match_store import (
+    DATA_DIR, DEFAULT_COMPETITION, HISTORICAL_CSV, MATCH_COLUMNS, concat_matches, csv_competitions, csv_path,
+    load_matches, season_of, to_typed,
+)
+from utils.prediction_storage import PRED_LOG, fixture_key, read_entries
+
+# offsets into the prediction log and each competition's csv mirror, unmatched predictions and running totals
+SCORING_STATE_FILE = os.path.join(DATA_DIR, "prediction_scores.json")
+
+OUTCOMES = ["home_win", "draw", "away_win"]
+
+# clip probabilities for log-loss so a confident miss doesn't give inf
+EPSILON = 1e-15
+
+
+def _empty_state():
+    return {"predictions_offset": 0, "results_offsets": {}, "last_result_day": None, "pending": [], "models": {}}
+
+
+def load_state(path=SCORING_STATE_FILE):
+    if not os.path.exists(path):
+        return _empty_state()
+    with open(path, "r") as f:
+        state = json.load(f)
+
+    # single-mirror state files tracked the premier league csv only
+    if "results_offset" in state:
+        state["results_offsets"] = {DEFAULT_COMPETITION: state.pop("results_offset")}
+    return state
+
+
+def save_state(state, path=SCORING_STATE_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+# results appended to the csv mirror after byte offset, and the offset to resume from.
+# a shorter file means the mirror was rewritten (import/export), so it is read again
+def read_new_results(offset=0, path=HISTORICAL_CSV, competition=DEFAULT_COMPETITION):
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=MATCH_COLUMNS), offset
+    if os.path.getsize(path) < offset:
+        offset = 0
+
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(max(offset, len(header)))
+        data = f.read()
+
+    end = data.rfind(b"\n") + 1
+    start = max(offset, len(header))
+    df = pd.read_csv(io.BytesIO(header + data[:end]))
+    return to_typed(df, competition), start + end
+
+
+def _outcome(home_goals, away_goals):
+    return 0 if home_goals > away_goals else 1 if home_goals == away_goals else 2
+
+
+def _score_one(totals, prediction, home_goals, away_goals):
+    outcome = _outcome(home_goals, away_goals)
+    model = totals.setdefault(prediction["model"], {
+        "matches": 0, "correct": 0, "probabilistic": 0, "brier_sum": 0.0, "log_loss_sum": 0.0,
+    })
+    model["matches"] += 1
+
+    probabilities = prediction.get("probabilities")
+    if probabilities is None:
+        # legacy entries only carry the scoreline
+        predicted_home, predicted_away = (int(goals) for goals in prediction["predicted_score"].split("-"))
+        model["correct"] += int(_outcome(predicted_home, predicted_away) == outcome)
+        return
+
+    vector = [probabilities[name] for name in OUTCOMES]
+    model["correct"] += int(max(range(3), key=vector.__getitem__) == outcome)
+    model["probabilistic"] += 1
+    model["brier_sum"] += sum((p - (i == outcome)) ** 2 for i, p in enumerate(vector))
+    model["log_loss_sum"] += -math.log(min(max(vector[outcome], EPSILON), 1.0))
+
+
+# result lookup (fixture day, home, away) -> (home goals, away goals)
+def _result_index(results):
+    days = results["date"].dt.strftime("%Y-%m-%d")
+    return {
+        (day, str(home), str(away)): (int(hg), int(ag))
+        for day, home, away, hg, ag in zip(
+            days, results["homeTeam"], results["awayTeam"], results["homeGoals"], results["awayGoals"]
+        )
+    }
+
+
+# results appended to every competition's csv mirror since the last run (offsets updated in place)
+def _read_new_results_all(offsets, competitions):
+    frames = []
+    for competition in competitions:
+        rows, offsets[competition] = read_new_results(offsets.get(competition, 0), csv_path(competition), competition)
+        if not rows.empty:
+            frames.append(rows)
+    return concat_matches(frames) if frames else pd.DataFrame(columns=MATCH_COLUMNS)
+
+
+# join predictions and results added since the last run and update the running totals.
+# predictions don't record their competition, so every competition's results are matched.
+# returns the number of predictions scored
+def score_new_results(state_path=SCORING_STATE_FILE, predictions_path=PRED_LOG, competitions=None):
+    state = load_state(state_path)
+    pending = state["pending"]
+
+    new_predictions, state["predictions_offset"] = read_entries(state["predictions_offset"], predictions_path)
+
+    # predictions made after their fixture's result was already processed are looked up once
+    late = []
+    for prediction in new_predictions:
+        if state["last_result_day"] is not None and prediction["fixture_date"][:10] <= state["last_result_day"]:
+            late.append(prediction)
+        else:
+            pending.append(prediction)
+
+    scored = 0
+    if late:
+        days = pd.to_datetime(pd.Series([p["fixture_date"][:10] for p in late]))
+        index = _result_index(load_matches(seasons=set(season_of(days).tolist())))
+        for prediction in late:
+            result = index.get(fixture_key(prediction["fixture_date"], prediction["home_team"], prediction["away_team"]))
+            if result is None:
+                pending.append(prediction)
+            else:
+                _score_one(state["models"], prediction, *result)
+                scored += 1
+
+    results = _read_new_results_all(state["results_offsets"], competitions or csv_competitions())
+
+    if not results.empty:
+        index = _result_index(results)
+        still_pending = []
+        for prediction in pending:
+            result = index.get(fixture_key(prediction["fixture_date"], prediction["home_team"], prediction["away_team"]))
+            if result is None:
+                still_pending.append(prediction)
+            else:
+                _score_one(state["models"], prediction, *result)
+                scored += 1
+        pending = still_pending
+
+        last_day = results["date"].max().strftime("%Y-%m-%d")
+        state["last_result_day"] = max(state["last_result_day"] or last_day, last_day)
+
+    state["pending"] = pending
+    save_state(state, state_path)
+    return scored
+
+
+# running accuracy, brier and log-loss per model
+def model_scores(state_path=SCORING_STATE_FILE):
+    scores = {}
+    for model, totals in load_state(state_path)["models"].items():
+        probabilistic = totals["probabilistic"]
+        scores[model] = {
+            "matches": totals["matches"],
+            "accuracy": totals["correct"] / totals["matches"] if totals["matches"] else None,
+            "brier": totals["brier_sum"] / probabilistic if probabilistic else None,
+            "log_loss": totals["log_loss_sum"] / probabilistic if probabilistic else None,
+        }
+    return scores
+
+
+def print_scores(scores):
+    for model, score in scores.items():
+        line = f"{model}: {score['matches']} scored, accuracy {score['accuracy']:.2%}"
+        if score["brier"] is not None:
+            line += f", brier {score['brier']:.4f}, log-loss {score['log_loss']:.4f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    scored = score_new_results()
+    print(f"Scored {scored} new predictions")
+    print_scores(model_scores())
@@ -1,36 +1,171 @@
 import json
 import os
 from datetime import datetime
+from utils.instrumentation import count, timed
 from utils.name_mapping import normalize_team_name
 
-PRED_FILE = "data/predictions.json"
+try:
+    import fcntl
+except ImportError:  # windows: appends are still single write calls
+    fcntl = None
 
-# save predictions into .json file
-def save_prediction(model_name, home_team, away_team, top_score, fixture_date):
-    os.makedirs("data", exist_ok=True)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
 
-    # load existing predictions
-    if os.path.exists(PRED_FILE):
-        with open(PRED_FILE, "r") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                data = []
-    else:
-        data = []
+# append-only log, one json prediction per line
+PRED_LOG = os.path.join(DATA_DIR, "predictions.jsonl")
 
+# previous read-modify-write format, migrated into the log on first use
+LEGACY_PRED_FILE = os.path.join(DATA_DIR, "predictions.json")
+
+# entries buffered by PredictionWriter before each write
+BATCH_SIZE = 500
+
+
+def make_entry(model_name, home_team, away_team, top_score, fixture_date,
+               probabilities=None, top_score_percentage=None, expected_goals=None):
     entry = {
         "model": model_name,
         "prediction_date": datetime.now().isoformat(),
         "fixture_date": fixture_date,
         "home_team": normalize_team_name(home_team),
         "away_team": normalize_team_name(away_team),
-        "predicted_score": top_score
+        "predicted_score": top_score,
     }
+    if probabilities is not None:
+        entry["probabilities"] = {k: float(v) for k, v in probabilities.items()}
+    if top_score_percentage is not None:
+        entry["top_score_percentage"] = float(top_score_percentage)
+    if expected_goals is not None:
+        entry["expected_goals"] = [float(goals) for goals in expected_goals]
+    return entry
+
 
-    data.append(entry)
+# append entries with one locked write, O(batch) regardless of log size
+@timed()
+def save_predictions(entries, path=PRED_LOG):
+    if not entries:
+        return
+    count("predictions_saved", len(entries))
 
-    with open(PRED_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    _migrate_legacy(path)
+    data = "".join(json.dumps(entry) + "\n" for entry in entries).encode()
+
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+# save predictions into the log
+def save_prediction(model_name, home_team, away_team, top_score, fixture_date,
+                    probabilities=None, top_score_percentage=None, expected_goals=None, path=PRED_LOG):
+    save_predictions([make_entry(
+        model_name, home_team, away_team, top_score, fixture_date,
+        probabilities, top_score_percentage, expected_goals,
+    )], path)
 
     print("Prediction saved.")
+
+
+# buffers entries and writes them in batches (flushes on exit)
+class PredictionWriter:
+    def __init__(self, path=PRED_LOG, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+
+    def add(self, entry):
+        self.pending.append(entry)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        save_predictions(self.pending, self.path)
+        self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+
+# entries appended after byte offset, and the offset to resume from.
+# a trailing line still being written is left for the next read
+def read_entries(offset=0, path=PRED_LOG):
+    _migrate_legacy(path)
+    if not os.path.exists(path):
+        return [], offset
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+
+    end = data.rfind(b"\n") + 1
+    entries = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+    return entries, offset + end
+
+
+def fixture_key(fixture_date, home_team, away_team):
+    return fixture_date[:10], normalize_team_name(home_team), normalize_team_name(away_team)
+
+
+# in-memory indexes over the log by model and fixture, refreshed by reading only new lines
+class PredictionLog:
+    def __init__(self, path=PRED_LOG):
+        self.path = path
+        self.offset = 0
+        self.entries = []
+        self.by_model = {}
+        self.by_fixture = {}
+
+    def refresh(self):
+        entries, self.offset = read_entries(self.offset, self.path)
+        for entry in entries:
+            i = len(self.entries)
+            self.entries.append(entry)
+            self.by_model.setdefault(entry["model"], []).append(i)
+            key = fixture_key(entry["fixture_date"], entry["home_team"], entry["away_team"])
+            self.by_fixture.setdefault(key, []).append(i)
+        return self
+
+    # predictions filtered by model, fixture (date, home, away) and fixture date range (iso strings)
+    def query(self, model=None, fixture=None, date_from=None, date_to=None):
+        self.refresh()
+
+        if fixture is not None:
+            candidates = self.by_fixture.get(fixture_key(*fixture), [])
+        elif model is not None:
+            candidates = self.by_model.get(model, [])
+        else:
+            candidates = range(len(self.entries))
+
+        results = []
+        for i in candidates:
+            entry = self.entries[i]
+            if model is not None and entry["model"] != model:
+                continue
+            if date_from is not None and entry["fixture_date"] < date_from:
+                continue
+            if date_to is not None and entry["fixture_date"] > date_to:
+                continue
+            results.append(entry)
+        return results
+
+
+def _migrate_legacy(path):
+    if path != PRED_LOG or os.path.exists(path) or not os.path.exists(LEGACY_PRED_FILE):
+        return
+
+    with open(LEGACY_PRED_FILE, "r") as f:
+        try:
+            legacy = json.load(f)
+        except json.JSONDecodeError:
+            legacy = []
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.writelines(json.dumps(entry) + "\n" for entry in legacy)